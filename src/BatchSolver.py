@@ -0,0 +1,100 @@
+from Cache import DEFAULT_PATH, open_cache
+from Solver import add_options, solve_file
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from glob import glob
+import argparse
+import json
+import os
+
+
+def get_files(patterns):
+    """ Return the config files matching a list of paths
+
+    :param patterns: (list) directories (all the JSON files they contain
+        are taken) or glob patterns such as 'data/*.json'
+    :return: (list) the sorted paths of the matching files, without
+        duplicates
+    :Examples:
+
+    >>> get_files(['../data'])[:2]
+    ['../data/grid1.json', '../data/grid2.json']
+    >>> get_files(['../data/grid[34].json', '../data/grid4.json'])
+    ['../data/grid3.json', '../data/grid4.json']
+    """
+    files = set()
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*.json')
+
+        files.update(glob(pattern))
+
+    return sorted(files)
+
+
+def solve_all(files, workers=None, **options):
+    """ Solve many config files in parallel, each one in a worker process
+
+    :param files: (list) the paths of the config files
+    :param workers: (int) the number of worker processes (by default, the
+        number of processors of the machine)
+    :param options: the options given to :func:`Solver.solve_file`
+    :return: (generator) the results of :func:`Solver.solve_file`, in the
+        order the files are solved. The files that can't be loaded give
+        a dict with the keys 'file' and 'error'
+    :Examples:
+
+    >>> files = ['../data/grid4.json', '../data/grid2.json', 'missing.json']
+    >>> for result in sorted(solve_all(files, 2), key=lambda r: r['file']):
+    ...     print(result['file'], result.get('length'), result.get('error'))
+    ../data/grid2.json None None
+    ../data/grid4.json 7 None
+    missing.json None File not found
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(solve_file, filename, **options): filename
+                   for filename in files}
+
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except (Exception, SystemExit) as error:
+                yield {'file': futures[future], 'error': str(error)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve many Ice Walker grids in parallel and print the "
+                    "results as JSON lines")
+    parser.add_argument("paths", nargs="+",
+                        help="config files, directories or glob patterns")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="the number of worker processes (default: the "
+                             "number of processors)")
+    add_options(parser)
+    args = parser.parse_args()
+
+    files = get_files(args.paths)
+
+    if not files:
+        exit("Error: no config file found")
+
+    cache = None
+
+    # check the cache once here rather than warning in every worker
+    if not args.no_cache:
+        solutions = open_cache(DEFAULT_PATH)
+
+        if solutions is not None:
+            solutions.close()
+            cache = DEFAULT_PATH
+
+    for result in solve_all(files, args.workers, method=args.method,
+                            symmetry=args.symmetry, bitboard=args.bitboard,
+                            cache=cache,
+                            tables=args.tables):
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
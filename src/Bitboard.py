@@ -0,0 +1,127 @@
+class Bitboard:
+    """ This class is a move engine working on integer bitmasks: for every
+    line and every column of a board, one mask tells where the walls and
+    borders stop a slide and another one where the thawed cells are. A
+    slide is then resolved with a few bit operations, whatever the size of
+    the board. It gives the same results as :meth:`Board.slide`, and can be
+    used in its place by a game (see :class:`Game.Game`)
+
+    :Examples:
+
+    >>> from Board import Board
+    >>> board = Board(4, 4)
+    >>> board.add_wall([1, 0, 'E'])
+    >>> board.thaw(0, 2)
+    >>> bitboard = Bitboard(board)
+    >>> bitboard.slide(0, 'E', (0,))
+    1
+    >>> bitboard.slide(0, 'S', (0,))
+    8
+    >>> bitboard.slide(3, 'W', (3, 2))
+    3
+    """
+
+    def __init__(self, board):
+        """ Build the masks of a board. The board must be complete: walls
+        or thawed cells added afterwards are ignored
+
+        :param board: (Board) the board
+        """
+        width, height = board.get_width(), board.get_height()
+        self.__width = width
+        # bit x of east[y] is set if a player can't leave (x, y) eastwards
+        self.__east = [0] * height
+        self.__west = [0] * height
+        # bit y of south[x] is set if a player can't leave (x, y) southwards
+        self.__south = [0] * width
+        self.__north = [0] * width
+        self.__thawed_lines = [0] * height
+        self.__thawed_columns = [0] * width
+
+        for y in range(height):
+            for x in range(width):
+                if board.is_blocked(x, y, 'E'):
+                    self.__east[y] |= 1 << x
+                if board.is_blocked(x, y, 'W'):
+                    self.__west[y] |= 1 << x
+                if board.is_blocked(x, y, 'S'):
+                    self.__south[x] |= 1 << y
+                if board.is_blocked(x, y, 'N'):
+                    self.__north[x] |= 1 << y
+                if board.is_thawed(x, y):
+                    self.__thawed_lines[y] |= 1 << x
+                    self.__thawed_columns[x] |= 1 << y
+
+    def slide(self, index, direction, occupied):
+        """ Return the index of the cell where a player standing on the cell
+        of index [index] stops when sliding towards [direction]
+
+        :param index: (int) the index of the cell of the player
+        :param direction: (str) the direction
+        :param occupied: (iterable) the indices of the cells of all players
+        :return: (int) the index of the cell where the player stops
+        :UC: direction in {'E', 'N', 'S', 'W'}
+        :Examples:
+
+        >>> from Board import Board
+        >>> bitboard = Bitboard(Board(4, 4))
+        >>> bitboard.slide(0, 'E', (0, 2))
+        1
+        >>> bitboard.slide(13, 'N', (13, 5, 2))
+        9
+        """
+        width = self.__width
+        y, x = divmod(index, width)
+
+        if direction in 'EW':
+            line = 0
+
+            for other in occupied:
+                if other // width == y:
+                    line |= 1 << (other % width)
+
+            stop = self.__stop(x, direction == 'E', line,
+                               self.__east[y] if direction == 'E'
+                               else self.__west[y], self.__thawed_lines[y])
+            return y * width + stop
+        else:
+            column = 0
+
+            for other in occupied:
+                if other % width == x:
+                    column |= 1 << (other // width)
+
+            stop = self.__stop(y, direction == 'S', column,
+                               self.__south[x] if direction == 'S'
+                               else self.__north[x], self.__thawed_columns[x])
+            return stop * width + x
+
+    @staticmethod
+    def __stop(position, forward, players, walls, thawed):
+        """ Return the position where a player stops on a line (or a column)
+
+        :param position: (int) the position of the player on the line
+        :param forward: (bool) True to slide towards the higher positions
+        :param players: (int) the mask of the players on the line
+        :param walls: (int) the mask of the positions that can't be left
+            in the direction of the slide
+        :param thawed: (int) the mask of the thawed cells of the line
+        :return: (int) the position where the player stops
+        """
+        if thawed >> position & 1:
+            return position
+
+        if forward:
+            ahead = -1 << position  # the bits from [position] onwards
+            # a player stops on a wall, on a thawed cell or before a player
+            stops = (walls | players >> 1) & ahead | thawed & ahead << 1
+            return (stops & -stops).bit_length() - 1
+        else:
+            behind = (1 << position + 1) - 1  # the bits up to [position]
+            stops = (walls | players << 1) & behind | thawed & behind >> 1
+            return stops.bit_length() - 1
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
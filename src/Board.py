@@ -0,0 +1,625 @@
+from collections import OrderedDict, deque
+import hashlib
+import json
+
+
+DIRECTIONS = ('N', 'S', 'E', 'W')
+OFFSETS = {'N': (0, -1), 'S': (0, 1), 'E': (1, 0), 'W': (-1, 0)}
+OPPOSITES = {'N': 'S', 'S': 'N', 'E': 'W', 'W': 'E'}
+
+# the bits of the flags of a cell (see Board.get_flags)
+WALL_E, WALL_S, THAWED, FINAL = 1, 2, 4, 8
+WALLS = {'E': WALL_E, 'S': WALL_S}
+
+# the table clearing the FINAL bit of the flags (see bytes.translate)
+WITHOUT_FINAL = bytes(flags & ~FINAL for flags in range(256))
+
+# the number of layouts whose tables are kept in memory
+MAX_LAYOUTS = 64
+
+# layout key (see Board.get_layout_key) -> the tables shared by the boards
+# of the layout, the least recently used layout first
+_layouts = OrderedDict()
+
+
+def get_layout_tables(key):
+    """ Return the tables shared by all the boards of a layout, making it the
+    most recently used one. The least recently used layouts are forgotten
+    once there are more than MAX_LAYOUTS of them
+
+    :param key: (str) the key of the layout (see :meth:`Board.get_layout_key`)
+    :return: (dict) the key 'stops' gives the slide-stop tables by direction
+        (each one computed when first needed), and the keys 'distances' and
+        'dead' give
+        dicts of the tables of :meth:`Board.get_distances` and
+        :meth:`Board.get_dead_cells` by index of final cell
+    :Examples:
+
+    >>> get_layout_tables('a') is get_layout_tables('a')
+    True
+    """
+    if key in _layouts:
+        _layouts.move_to_end(key)
+    else:
+        _layouts[key] = {'stops': dict(), 'distances': dict(),
+                         'dead': dict()}
+
+        if len(_layouts) > MAX_LAYOUTS:
+            _layouts.popitem(last=False)
+
+    return _layouts[key]
+
+
+def load_tables(filename):
+    """ Load into memory the tables saved by :meth:`Board.save_tables`, so
+    that the boards of the same layout don't compute them
+
+    :param filename: (str) the path of the file
+    :return: (str) the key of the layout the tables were saved for (see
+        :meth:`Board.get_layout_key`), or None if the file can't be read
+        or isn't a file of tables (nothing is loaded then)
+    :Examples:
+
+    >>> import os, tempfile
+    >>> board = Board(3, 2)
+    >>> board.set_final_cell(2, 1)
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'board.tables')
+    >>> board.save_tables(filename)
+    >>> load_tables(filename) == board.get_layout_key()
+    True
+    >>> board.add_wall([0, 0, 'E'])
+    >>> load_tables(filename) == board.get_layout_key()
+    False
+    >>> with open(filename, 'w') as file:
+    ...     _ = file.write('{"layout": "a"}')
+    >>> load_tables(filename) is None
+    True
+    >>> os.remove(filename)
+    >>> load_tables(filename) is None
+    True
+    """
+    try:
+        with open(filename) as file:
+            data = json.load(file)
+
+        layout = str(data['layout'])
+        all_stops = {direction: list(data['stops'][direction])
+                     for direction in DIRECTIONS}
+        all_distances = [(int(final), list(distances))
+                         for final, distances in data['distances']]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    tables = get_layout_tables(layout)
+
+    for direction, stops in all_stops.items():
+        tables['stops'].setdefault(direction, stops)
+
+    for final, distances in all_distances:
+        tables['distances'].setdefault(final, distances)
+
+    return layout
+
+
+class Board:
+    """ This class represents the static part of an Ice Walker grid: its
+    dimensions, its walls, its thawed cells and its final cell. Nothing
+    in a board depends on where the players are, so a single board can
+    be shared by any number of grids (see :meth:`Grid.from_board`). Each
+    cell is stored as a byte of flags (see :meth:`get_flags`), so that a
+    board of a million cells only takes a megabyte
+
+    :Examples:
+
+    >>> board = Board(3, 2)
+    >>> board.add_wall([0, 0, 'S'])
+    >>> board.thaw(1, 1)
+    >>> board.set_final_cell(2, 0)
+    >>> sorted(board.get_walls(0, 0))
+    ['S']
+    >>> sorted(board.get_walls(2, 1))
+    ['E']
+    >>> board.is_thawed(1, 1)
+    True
+    >>> board.get_final_cell()
+    (2, 0)
+    """
+
+    def __init__(self, width, height):
+        """ Create an empty board (without any wall other than the east
+        border, thawed cell or final cell)
+
+        :param width: (int) the width of the board
+        :param height: (int) the height of the board
+        :raises TypeError: if width/height are not integers
+        :raises ValueError: if width < 0 or height < 0
+        :UC: width > 0, height > 0
+        :Examples:
+
+        >>> b = Board(2, 2)
+        >>> b = Board(2, 0)
+        Traceback (most recent call last):
+        ...
+        ValueError: Grid dimensions must be positive integers
+        """
+
+        if type(width) != int or type(height) != int:
+            raise TypeError("Grid dimensions must be positive integers")
+        elif width <= 0 or height <= 0:
+            raise ValueError("Grid dimensions must be positive integers")
+
+        self.__width = width
+        self.__height = height
+        self.__flags = bytearray(width * height)
+        # the indices of the thawed cells, built from the flags on demand
+        self.__thawed = frozenset()
+        self.__final = None
+        self.__layout = None
+        self.__stops = None
+        self.__distances = None
+        self.__dead = None
+
+        for y in range(height):
+            self.__flags[self.get_index(width - 1, y)] |= WALL_E
+
+    def get_width(self):
+        """ Return the width of the board
+        :return: (int) the width
+        """
+        return self.__width
+
+    def get_height(self):
+        """ Return the height of the board
+        :return: (int) the height
+        """
+        return self.__height
+
+    def get_index(self, x, y):
+        """ Return the index of the cell of coordinates (x, y) when the cells
+        are numbered line by line, from the top left corner
+
+        :param x: (int) the x coordinate
+        :param y: (int) the y coordinate
+        :return: (int) the index of the cell
+        :UC: x in range(board_width) and y in range(board_height)
+        :Examples:
+
+        >>> b = Board(4, 3)
+        >>> b.get_index(0, 0)
+        0
+        >>> b.get_index(2, 1)
+        6
+        """
+        return y * self.__width + x
+
+    def get_position(self, index):
+        """ Return the coordinates of the cell of index [index]
+
+        :param index: (int) the index of the cell
+        :return: (tuple) the coordinates (x, y) of the cell
+        :UC: index in range(board_width * board_height)
+        :Examples:
+
+        >>> b = Board(4, 3)
+        >>> b.get_position(6)
+        (2, 1)
+        """
+        return index % self.__width, index // self.__width
+
+    def get_flags(self, index):
+        """ Return the flags of the cell of index [index]: the bits WALL_E
+        and WALL_S are set if the cell has a wall on its east/south side,
+        THAWED if it is thawed and FINAL if it is the final cell
+
+        :param index: (int) the index of the cell
+        :return: (int) the flags of the cell
+        :UC: index in range(board_width * board_height)
+        :Examples:
+
+        >>> b = Board(2, 1)
+        >>> b.thaw(0, 0)
+        >>> b.get_flags(0) == THAWED, b.get_flags(1) == WALL_E
+        (True, True)
+        """
+        return self.__flags[index]
+
+    def get_walls(self, x, y):
+        """ Return the walls of the cell of coordinates (x, y)
+
+        :param x: (int) the x coordinate
+        :param y: (int) the y coordinate
+        :return: (set) a new set of the walls of the cell, a subset of
+            {'E', 'S'} (walls are added with :meth:`add_wall` only)
+        :UC: x in range(board_width) and y in range(board_height)
+        """
+        flags = self.__flags[self.get_index(x, y)]
+        return {wall for wall, bit in WALLS.items() if flags & bit}
+
+    def add_wall(self, wall):
+        """ Add a wall to a certain cell
+
+        :param wall: (list) a list of the form [x, y, direction]
+        :raises TypeError: if the list if not of the correct form
+        :raises ValueError: if direction is neither 'E' nor 'S'
+        :UC: x in range(board_width) and y in range(board_height)
+        :Examples:
+
+        >>> b = Board(3, 3)
+        >>> b.add_wall([1, 2, 'S'])
+        >>> 'S' in b.get_walls(1, 2)
+        True
+        >>> b.add_wall([1, 2, 'N'])
+        Traceback (most recent call last):
+        ...
+        ValueError: direction must be either 'E' or 'S'
+        """
+        if type(wall) not in {list, tuple} or len(wall) != 3:
+            raise TypeError("wall must be a list (or a tuple) of length 3")
+
+        x, y, direction = wall
+
+        if direction not in {'E', 'S'}:
+            raise ValueError("direction must be either 'E' or 'S'")
+
+        self.__flags[self.get_index(x, y)] |= WALLS[direction]
+        self.__layout = None
+        self.__stops = None
+        self.__distances = None
+        self.__dead = None
+
+    def is_thawed(self, x, y):
+        """ Return True if the cell of coordinates (x, y) is thawed
+
+        :param x: (int) the x coordinate
+        :param y: (int) the y coordinate
+        :return: (bool) True if the cell is thawed, False otherwise
+        """
+        return bool(self.__flags[self.get_index(x, y)] & THAWED)
+
+    def get_thawed_cells(self):
+        """ Return the indices of the thawed cells
+
+        :return: (frozenset) the indices of the thawed cells
+        :Examples:
+
+        >>> b = Board(3, 3)
+        >>> b.thaw(1, 2)
+        >>> b.get_thawed_cells()
+        frozenset({7})
+        """
+        if self.__thawed is None:
+            self.__thawed = frozenset(
+                index for index, flags in enumerate(self.__flags)
+                if flags & THAWED)
+
+        return self.__thawed
+
+    def thaw(self, x, y):
+        """ Thaw the cell of coordinates (x, y)
+
+        :param x: (int) the x coordinate
+        :param y: (int) the y coordinate
+        """
+        self.__flags[self.get_index(x, y)] |= THAWED
+        self.__thawed = None
+        self.__layout = None
+        self.__stops = None
+        self.__distances = None
+        self.__dead = None
+
+    def is_final_cell(self, x, y):
+        """ Return True if the cell of coordinates (x, y) is the final one
+
+        :param x: (int) the x coordinate
+        :param y: (int) the y coordinate
+        :return: (bool) True if the cell is the final one, False otherwise
+        """
+        return self.__final == self.get_index(x, y)
+
+    def set_final_cell(self, x, y):
+        """ Define the cell of coordinates (x, y) as the final one
+
+        :param x: (int) the x coordinate
+        :param y: (int) the y coordinate
+        """
+        if self.__final is not None:
+            self.__flags[self.__final] &= ~FINAL
+
+        self.__final = self.get_index(x, y)
+        self.__flags[self.__final] |= FINAL
+        self.__distances = None
+        self.__dead = None
+
+    def get_final_cell(self):
+        """ Return the coordinates of the final cell
+
+        :return: (tuple) the coordinates (x, y), or None if there is
+            no final cell
+        """
+        if self.__final is None:
+            return None
+
+        return self.get_position(self.__final)
+
+    def is_blocked(self, x, y, direction):
+        """ Return True if a wall or a border prevents from leaving the cell
+        of coordinates (x, y) towards [direction]
+
+        :param x: (int) the x coordinate
+        :param y: (int) the y coordinate
+        :param direction: (str) the direction
+        :return: (bool) True if the way is blocked, False otherwise
+        :UC: direction in {'E', 'N', 'S', 'W'}
+        :Examples:
+
+        >>> b = Board(3, 3)
+        >>> b.add_wall([0, 0, 'S'])
+        >>> b.is_blocked(0, 0, 'S'), b.is_blocked(0, 1, 'N')
+        (True, True)
+        >>> b.is_blocked(0, 0, 'W'), b.is_blocked(1, 1, 'W')
+        (True, False)
+        """
+        dx, dy = OFFSETS[direction]
+        new_x, new_y = x + dx, y + dy
+
+        if new_x not in range(self.__width) or \
+                new_y not in range(self.__height):
+            return True
+
+        # the wall between two cells is stored in the west/north one
+        wall = WALL_E if dx else WALL_S
+
+        if dx + dy > 0:
+            return bool(self.__flags[self.get_index(x, y)] & wall)
+        else:
+            return bool(self.__flags[self.get_index(new_x, new_y)] & wall)
+
+    def get_layout_key(self):
+        """ Return a hash of the layout of the board: its dimensions, walls
+        and thawed cells. The boards of the same layout share their tables
+        (see :meth:`get_stops`, :meth:`get_distances` and
+        :meth:`get_dead_cells`), which are only computed once for all of
+        them, whatever their final cells
+
+        :return: (str) the hexadecimal SHA-256 hash of the layout
+        :Examples:
+
+        >>> b1, b2 = Board(3, 3), Board(3, 3)
+        >>> b1.set_final_cell(0, 0)
+        >>> b1.get_layout_key() == b2.get_layout_key()
+        True
+        >>> b2.thaw(1, 1)
+        >>> b1.get_layout_key() == b2.get_layout_key()
+        False
+        """
+        if self.__layout is None:
+            layout = hashlib.sha256(b'%d %d ' % (self.__width, self.__height))
+            layout.update(self.__flags.translate(WITHOUT_FINAL))
+            self.__layout = layout.hexdigest()
+
+        return self.__layout
+
+    def save_tables(self, filename):
+        """ Save the slide-stop tables of the board and the distances to its
+        final cell in a JSON file (see :func:`load_tables`)
+
+        :param filename: (str) the path of the file
+        """
+        data = {'layout': self.get_layout_key(),
+                'stops': {d: self.get_stops(d) for d in DIRECTIONS},
+                'distances': [[self.__final, self.get_distances()]]}
+
+        with open(filename, 'w') as file:
+            json.dump(data, file)
+
+    def get_stops(self, direction):
+        """ Return the slide-stop table of [direction]: the i-th element is
+        the index of the cell where a player starting from the cell of index
+        i stops when sliding towards [direction] on the empty board, i.e.
+        the first cell before a wall or a border, or the first thawed cell
+        met on the way. Each table is computed once for all the boards of
+        the same layout (see :meth:`get_layout_key`), when first needed
+        after the board has been set up, so a move only computes the table
+        of its own direction. They must not be modified
+
+        :param direction: (str) the direction
+        :return: (list) the stop table
+        :UC: direction in {'E', 'N', 'S', 'W'}
+        :Examples:
+
+        >>> b = Board(4, 1)
+        >>> b.add_wall([1, 0, 'E'])
+        >>> b.get_stops('E')
+        [1, 1, 3, 3]
+        >>> b.thaw(2, 0)
+        >>> b.get_stops('W')
+        [0, 0, 2, 2]
+        """
+        if self.__stops is None:
+            self.__stops = get_layout_tables(self.get_layout_key())['stops']
+
+        if direction not in self.__stops:
+            self.__stops[direction] = self.__compute_stops(direction)
+
+        return self.__stops[direction]
+
+    def __compute_stops(self, direction):
+        """ Compute the slide-stop table of [direction] from the flags, line
+        by line (or column by column), from the far side of the board so
+        that the stop of the next cell is always known
+
+        :param direction: (str) the direction
+        :return: (list) the stop table
+        """
+        width, height, flags = self.__width, self.__height, self.__flags
+        dx, dy = OFFSETS[direction]
+        wall = WALL_E if dx else WALL_S
+        # the wall crossed when leaving a cell is stored in the cell itself
+        # towards E/S, in the next cell towards W/N
+        holder = 0 if dx + dy > 0 else dx + dy * width
+        # the cells on the border or blocked stop on themselves
+        stops = list(range(width * height))
+
+        if dx:
+            lines = [range(y * width, (y + 1) * width) for y in range(height)]
+        else:
+            lines = [range(x, width * height, width) for x in range(width)]
+
+        for line in lines:
+            cells = line[::-1] if dx + dy > 0 else line
+
+            for next_index, index in zip(cells, cells[1:]):
+                if not flags[index] & THAWED and \
+                        not flags[index + holder] & wall:
+                    stops[index] = next_index if flags[next_index] & THAWED \
+                        else stops[next_index]
+
+        return stops
+
+    def slide(self, index, direction, occupied):
+        """ Return the index of the cell where a player standing on the cell
+        of index [index] stops when sliding towards [direction]: the stop of
+        the empty board, unless another player stands on the way
+
+        :param index: (int) the index of the cell of the player
+        :param direction: (str) the direction
+        :param occupied: (iterable) the indices of the cells of all players
+        :return: (int) the index of the cell where the player stops
+        :UC: direction in {'E', 'N', 'S', 'W'}
+        :Examples:
+
+        >>> b = Board(4, 4)
+        >>> b.slide(0, 'E', (0,))
+        3
+        >>> b.slide(0, 'E', (0, 2))
+        1
+        >>> b.slide(13, 'N', (13, 5, 2))
+        9
+        """
+        stop = self.get_stops(direction)[index]
+
+        if stop == index:
+            return index
+
+        width = self.__width
+
+        if direction == 'E':
+            for other in occupied:
+                if index < other <= stop:
+                    stop = other - 1
+        elif direction == 'W':
+            for other in occupied:
+                if stop <= other < index:
+                    stop = other + 1
+        elif direction == 'S':
+            for other in occupied:
+                if index < other <= stop and (other - index) % width == 0:
+                    stop = other - width
+        else:
+            for other in occupied:
+                if stop <= other < index and (index - other) % width == 0:
+                    stop = other + width
+
+        return stop
+
+    def get_distances(self):
+        """ Return, for every cell, a lower bound of the number of moves
+        needed to bring the main player from this cell to the final cell.
+        The bound is the distance in the graph where a player may stop
+        anywhere on its way (the other players can always be used as
+        blockers, but never make a slide longer). It is computed once for
+        all the boards of the same layout and final cell
+
+        :return: (list) the i-th element is the bound for the cell of index
+            i, or None if the final cell can't be reached from it at all
+        :Examples:
+
+        >>> b = Board(3, 3)
+        >>> b.set_final_cell(1, 1)
+        >>> b.add_wall([1, 1, 'E'])
+        >>> b.thaw(1, 0)
+        >>> b.get_distances()
+        [2, None, 3, 1, 0, 3, 2, 1, 2]
+        """
+        if self.__distances is None:
+            tables = get_layout_tables(self.get_layout_key())['distances']
+
+            if self.__final not in tables:
+                tables[self.__final] = self.__compute_distances()
+
+            self.__distances = tables[self.__final]
+
+        return self.__distances
+
+    def __compute_distances(self):
+        """ Compute the bounds of :meth:`get_distances` with a backward
+        breadth-first search from the final cell
+
+        :return: (list) the bounds
+        """
+        distances = [None] * (self.__width * self.__height)
+        queue = deque()
+
+        if self.__final is not None:
+            distances[self.__final] = 0
+            queue.append(self.__final)
+
+        while queue:
+            index = queue.popleft()
+            x, y = self.get_position(index)
+
+            for direction in DIRECTIONS:
+                # walk back from the cell, against [direction], to find all
+                # the cells from which a slide towards [direction] passes by
+                dx, dy = OFFSETS[direction]
+                prev_x, prev_y = x, y
+
+                while not self.is_blocked(prev_x, prev_y, OPPOSITES[direction]):
+                    prev_x, prev_y = prev_x - dx, prev_y - dy
+                    previous = self.get_index(prev_x, prev_y)
+
+                    if self.__flags[previous] & THAWED:
+                        break
+
+                    if distances[previous] is None:
+                        distances[previous] = distances[index] + 1
+                        queue.append(previous)
+
+        return distances
+
+    def get_dead_cells(self):
+        """ Return the cells from which the main player can never reach the
+        final cell, whatever the other players do: the thawed cells and the
+        cells from which all the ways lead to walls or thawed cells only
+
+        :return: (frozenset) the indices of the dead cells
+        :Examples:
+
+        >>> b = Board(3, 3)
+        >>> b.set_final_cell(1, 1)
+        >>> b.add_wall([1, 1, 'E'])
+        >>> b.thaw(1, 0)
+        >>> sorted(b.get_dead_cells())
+        [1]
+        >>> b.add_wall([0, 0, 'E'])
+        >>> b.add_wall([0, 0, 'S'])
+        >>> sorted(b.get_dead_cells())
+        [0, 1]
+        """
+        if self.__dead is None:
+            tables = get_layout_tables(self.get_layout_key())['dead']
+
+            if self.__final not in tables:
+                distances = self.get_distances()
+                tables[self.__final] = frozenset(
+                    index for index in range(len(distances))
+                    if distances[index] is None)
+
+            self.__dead = tables[self.__final]
+
+        return self.__dead
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+
+
+# the database used by default, shared by all the solvers of the user
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'icewalker',
+                            'solutions.sqlite')
+
+# the number of solutions kept by default
+MAX_ENTRIES = 10000
+
+
+def get_key(game):
+    """ Return a hash of the content of a game: its dimensions, walls,
+    thawed cells (see :meth:`Board.get_layout_key`), final cell and the
+    positions of its players. Two games built from different files (or
+    walls given in a different order) have the same key as long as they are
+    the same puzzle
+
+    :param game: (Game) the game
+    :return: (str) the hexadecimal SHA-256 hash of the game
+    :Examples:
+
+    >>> from Grid import Grid
+    >>> from Game import Game
+    >>> from Player import Player
+    >>> g1, g2 = Grid(3, 3), Grid(3, 3)
+    >>> g1.add_wall([0, 0, 'E']); g1.add_wall([1, 1, 'S'])
+    >>> g2.add_wall([1, 1, 'S']); g2.add_wall([0, 0, 'E'])
+    >>> for g in (g1, g2): g.set_player(Player(0, 0, 0))
+    >>> get_key(Game(g1)) == get_key(Game(g2))
+    True
+    >>> g2.add_wall([2, 0, 'S'])
+    >>> get_key(Game(g1)) == get_key(Game(g2))
+    False
+    """
+    board = game.get_grid().get_board()
+    content = [board.get_layout_key(), board.get_final_cell(),
+               game.get_state()]
+
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+def open_cache(filename=DEFAULT_PATH, max_entries=MAX_ENTRIES):
+    """ Open a cache if possible. The cache is only an optimisation: when
+    its database can't be created or opened (e.g. the home directory isn't
+    writable), a warning is printed on stderr and the solvers go on
+    without it
+
+    :param filename: (str) the path of the database
+    :param max_entries: (int) the number of solutions kept
+    :return: (Cache) the cache, or None if it can't be opened
+    :Examples:
+
+    >>> import contextlib, io
+    >>> with contextlib.redirect_stderr(io.StringIO()) as err:
+    ...     open_cache('/proc/self/icewalker/solutions.sqlite')
+    >>> err.getvalue().startswith("Warning: the cache can't be used")
+    True
+    """
+    try:
+        return Cache(filename, max_entries)
+    except (OSError, sqlite3.Error) as error:
+        print("Warning: the cache can't be used (%s), solving without it"
+              % error, file=sys.stderr)
+        return None
+
+
+class Cache:
+    """ This class represents a persistent cache of the solutions of Ice
+    Walker games, stored in a sqlite database and keyed by the content of
+    the games (see :func:`get_key`). When it is full, the least recently
+    used solutions are forgotten
+
+    :Examples:
+
+    >>> from Game import Game
+    >>> cache = Cache(':memory:', 2)
+    >>> game = Game.from_file('../data/grid3.json')
+    >>> cache.get_solution(game)
+    Traceback (most recent call last):
+    ...
+    KeyError: 'game not in the cache'
+    >>> cache.set_solution(game, [(0, 'S'), (0, 'E')])
+    >>> cache.get_solution(game)
+    [(0, 'S'), (0, 'E')]
+    >>> cache.close()
+    """
+
+    def __init__(self, filename=DEFAULT_PATH, max_entries=MAX_ENTRIES):
+        """ Open (or create) a cache
+
+        :param filename: (str) the path of the database (':memory:' for a
+            cache that isn't saved)
+        :param max_entries: (int) the number of solutions kept
+        :UC: max_entries > 0
+        """
+        if filename != ':memory:' and os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        # several processes may share the database: wait for their writes
+        self.__connection = sqlite3.connect(filename, timeout=30)
+        self.__max_entries = max_entries
+
+        with self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions "
+                "(key TEXT PRIMARY KEY, moves TEXT, used INTEGER)")
+
+    def __len__(self):
+        """ Return the number of solutions in the cache
+
+        :return: (int) the number of solutions
+        """
+        return self.__connection.execute(
+            "SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def get_solution(self, game):
+        """ Return the solution of a game, and mark it as recently used
+
+        :param game: (Game) the game
+        :return: (list) the moves (player, direction) of the solution, or
+            None if the game was found unsolvable
+        :raises KeyError: if the game is not in the cache
+        """
+        key = get_key(game)
+        row = self.__connection.execute(
+            "SELECT moves FROM solutions WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            raise KeyError("game not in the cache")
+
+        with self.__connection:
+            self.__connection.execute(
+                "UPDATE solutions SET used = "
+                "(SELECT MAX(used) + 1 FROM solutions) WHERE key = ?", (key,))
+
+        moves = json.loads(row[0])
+
+        return None if moves is None else [tuple(move) for move in moves]
+
+    def set_solution(self, game, moves):
+        """ Save the solution of a game, forgetting the least recently used
+        solutions if the cache is full
+
+        :param game: (Game) the game
+        :param moves: (list) the moves (player, direction) of the solution,
+            or None if the game can't be solved
+        :Examples:
+
+        >>> from Game import Game
+        >>> cache = Cache(':memory:', 2)
+        >>> games = [Game.from_file('../data/grid%d.json' % n)
+        ...          for n in (2, 3, 4)]
+        >>> cache.set_solution(games[0], None)
+        >>> cache.set_solution(games[1], [])
+        >>> cache.get_solution(games[0]) is None
+        True
+        >>> cache.set_solution(games[2], [])
+        >>> len(cache)
+        2
+        >>> cache.get_solution(games[1])
+        Traceback (most recent call last):
+        ...
+        KeyError: 'game not in the cache'
+        """
+        with self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?, "
+                "(SELECT COALESCE(MAX(used), 0) + 1 FROM solutions))",
+                (get_key(game), json.dumps(moves)))
+            self.__connection.execute(
+                "DELETE FROM solutions WHERE key NOT IN (SELECT key FROM "
+                "solutions ORDER BY used DESC LIMIT ?)",
+                (self.__max_entries,))
+
+    def close(self):
+        """ Close the database of the cache
+        """
+        self.__connection.close()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=True)
@@ -28,7 +28,8 @@ class Cell:
     >>> cell
     3|
     """
-    
+
+    __slots__ = ('__content', '__final', '__thawed', '__walls')
 
     def __init__(self):
         """ Create a new cell for the icewalker grid
@@ -118,7 +119,7 @@ class Cell:
         >>> c.is_empty()
         False
         """
-        return self.__content is None
+        return self.get_content() is None
 
     def get_content(self):
         """ Get the content of the current cell
@@ -234,9 +235,9 @@ class Cell:
             else:
                 string = ' '
         else:
-            string = str(self.__content)
+            string = str(self.get_content())
 
-        if 'E' in self.__walls:
+        if 'E' in self.get_walls():
             string += '|'
         else:
             string += ' '
@@ -0,0 +1,137 @@
+from Bitboard import Bitboard
+from Board import DIRECTIONS
+from Game import Game
+from Solver import add_search_options, encode_move, get_path
+from array import array
+from collections import deque
+import argparse
+import json
+
+
+def distance_map(game, symmetry=False, stats=None):
+    """ Find, for every cell, a shortest sequence of moves after which the
+    main player stands on it, with a single exhaustive breadth-first search
+    from the initial state. The final cell of the game is ignored (the main
+    player slides over it as over any other cell), so the result tells how
+    many moves each cell would need to win if it were the final cell
+
+    :param game: (Game) the game to explore
+    :param symmetry: (bool) see :func:`Solver.bfs`
+    :param stats: (dict) see :func:`Solver.bfs`
+    :return: (dict) the moves (player, direction) bringing the main player
+        on each cell (x, y) it can reach, the cells it can't reach being
+        left out
+    :Examples:
+
+    >>> from Grid import Grid
+    >>> from Player import Player
+    >>> grid = Grid(3, 2)
+    >>> grid.add_wall([0, 1, 'E'])
+    >>> grid.set_player(Player(0, 0, 0))
+    >>> cells = distance_map(Game(grid))
+    >>> sorted((cell, len(moves)) for cell, moves in cells.items())
+    [((0, 0), 0), ((0, 1), 1), ((1, 0), 4), ((1, 1), 3), ((2, 0), 1), ((2, 1), 2)]
+    >>> cells[(2, 1)]
+    [(0, 'E'), (0, 'S')]
+    """
+    start = game.get_state()
+    stats = dict() if stats is None else stats
+    stats['expanded'] = 0
+    board = game.get_grid().get_board()
+
+    # key of a state -> id of the state (see Solver.get_path)
+    ids = {game.canonical(start) if symmetry else start: 0}
+    parents = array('q', [-1])
+    moves = bytearray(1)
+    # cell index -> id of the first state with the main player on it
+    cells = {start[0]: 0}
+    queue = deque([(0, start)])
+
+    while queue:
+        config_id, config = queue.popleft()
+
+        # a player on a thawed cell can't move anymore: the game is over
+        if game.is_losing(config):
+            continue
+
+        stats['expanded'] += 1
+
+        for num in range(len(config)):
+            for direction in DIRECTIONS:
+                state = game.slide(config, num, direction)
+                key = game.canonical(state) if symmetry else state
+
+                if key not in ids:
+                    ids[key] = state_id = len(parents)
+                    parents.append(config_id)
+                    moves.append(encode_move(num, direction))
+                    cells.setdefault(state[0], state_id)
+                    queue.append((state_id, state))
+
+    return {board.get_position(index): get_path(parents, moves, state_id)
+            for index, state_id in cells.items()}
+
+
+def format_map(cells, width, height):
+    """ Draw the number of moves needed to reach each cell as a grid
+
+    :param cells: (dict) the moves bringing the main player on each cell
+        (see :func:`distance_map`)
+    :param width: (int) the width of the board
+    :param height: (int) the height of the board
+    :return: (str) the rows of the map, the cells that can't be reached
+        being shown as '.'
+    :Examples:
+
+    >>> print(format_map({(0, 0): [], (1, 1): [(0, 'S')] * 12}, 2, 2))
+     0  .
+     . 12
+    """
+    size = max(len(str(len(moves))) for moves in cells.values())
+
+    return "\n".join(
+        " ".join(str(len(cells[(x, y)]) if (x, y) in cells else '.')
+                 .rjust(size) for x in range(width))
+        for y in range(height))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute the number of moves the main player needs to "
+                    "reach each cell of an Ice Walker grid")
+    parser.add_argument("filename", help="the path of the config file")
+    parser.add_argument("--json", action="store_true",
+                        help="print the map as JSON")
+    parser.add_argument("--paths", action="store_true",
+                        help="print the moves reaching each cell too")
+    add_search_options(parser)
+    args = parser.parse_args()
+
+    engine = Bitboard if args.bitboard else None
+    game = Game.from_file(args.filename, engine)
+    width = game.get_grid().get_width()
+    height = game.get_grid().get_height()
+    cells = distance_map(game, args.symmetry)
+
+    if args.json:
+        result = {'file': args.filename,
+                  'distances': [[len(cells[(x, y)]) if (x, y) in cells
+                                 else None for x in range(width)]
+                                for y in range(height)]}
+
+        if args.paths:
+            result['moves'] = {"%d,%d" % cell: moves
+                               for cell, moves in sorted(cells.items())}
+
+        print(json.dumps(result))
+        return
+
+    print(format_map(cells, width, height))
+
+    if args.paths:
+        for cell, moves in sorted(cells.items()):
+            print(cell, moves)
+
+
+if __name__ == "__main__":
+    main()
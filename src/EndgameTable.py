@@ -0,0 +1,210 @@
+from Game import Game
+from array import array
+from bisect import bisect_left
+from collections import deque
+import argparse
+import mmap
+import struct
+
+
+# the header of a table file: a tag, the number of states, the number of
+# cells of the board and the number of players
+HEADER = struct.Struct('<4sQQQ')
+TAG = b'IWET'
+
+# the distance stored for the states from which the game can't be won
+LOST = 255
+
+
+class EndgameTable:
+    """ This class represents an endgame table of an Ice Walker game: the
+    number of moves needed to win from every state reachable from the
+    initial state, found by a retrograde (backward) breadth-first search
+    from the winning states. The table is saved in a file holding the
+    sorted packed states (see :meth:`Game.pack`) followed by their
+    distances, one byte each, and is read through a memory map. The states
+    equal up to a permutation of the players other than the main one share
+    an entry (see :meth:`Game.canonical`)
+
+    :Examples:
+
+    >>> import os, tempfile
+    >>> game = Game.from_file('../data/grid6.json')
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'grid6.table')
+    >>> table = EndgameTable.build(game, filename)
+    >>> table.get_distance(game.get_state())
+    8
+    >>> table.get_best_move(game.get_state())
+    (0, 'S')
+    >>> table.close()
+    >>> os.remove(filename)
+    """
+
+    def __init__(self, game, filename):
+        """ Open the endgame table of a game
+
+        :param game: (Game) the game the table was built for
+        :param filename: (str) the path of the table
+        :raises ValueError: if the file isn't a table of a board of the
+            same size with the same number of players
+        """
+        width = game.get_grid().get_width()
+        height = game.get_grid().get_height()
+        self.__game = game
+
+        with open(filename, 'rb') as file:
+            self.__mapping = mmap.mmap(file.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+
+        tag, count, size, players = HEADER.unpack_from(self.__mapping)
+
+        if tag != TAG or size != width * height or \
+                players != len(game.get_state()):
+            self.__mapping.close()
+            raise ValueError("The file isn't an endgame table of this game")
+
+        view = memoryview(self.__mapping)
+        self.__keys = view[HEADER.size:HEADER.size + count * 8].cast('Q')
+        self.__distances = view[HEADER.size + count * 8:]
+
+    @classmethod
+    def build(cls, game, filename):
+        """ Compute the endgame table of a game and save it
+
+        :param game: (Game) the game
+        :param filename: (str) the path of the table to write
+        :return: (EndgameTable) the table
+        :raises ValueError: if the states of the game don't fit in 64 bits
+            or a state needs more than 254 moves to win
+        """
+        start = game.get_state()
+        size = game.get_grid().get_width() * game.get_grid().get_height()
+
+        if size ** len(start) > 2 ** 64:
+            raise ValueError("The states of the game don't fit in 64 bits")
+
+        def key(state):
+            return game.pack(game.canonical(state))
+
+        # the states reachable from the initial state, the game being over
+        # once a winning state is reached
+        reachable = {key(start)} if not game.is_dead(start) else set()
+        queue = deque([start] if reachable else [])
+
+        while queue:
+            config = queue.popleft()
+
+            if game.is_winning(config):
+                continue
+
+            for num, direction, state in game.successors(config):
+                state_key = key(state)
+
+                if state_key not in reachable:
+                    reachable.add(state_key)
+                    queue.append(state)
+
+        # the retrograde search, restricted to the reachable states
+        frontier = [game.unpack(code) for code in reachable
+                    if game.is_winning(game.unpack(code))]
+        distances = dict.fromkeys(map(key, frontier), 0)
+
+        while frontier:
+            new_frontier = list()
+
+            for config in frontier:
+                distance = distances[key(config)] + 1
+
+                if distance >= LOST:
+                    raise ValueError("A state needs too many moves to win")
+
+                for num, direction, state in game.predecessors(config):
+                    state_key = key(state)
+
+                    if state_key in reachable and state_key not in distances:
+                        distances[state_key] = distance
+                        new_frontier.append(state)
+
+            frontier = new_frontier
+
+        keys = array('Q', sorted(reachable))
+
+        with open(filename, 'wb') as file:
+            file.write(HEADER.pack(TAG, len(keys), size, len(start)))
+            keys.tofile(file)
+            file.write(bytes(distances.get(code, LOST) for code in keys))
+
+        return cls(game, filename)
+
+    def __len__(self):
+        """ Return the number of states of the table
+
+        :return: (int) the number of states
+        """
+        return len(self.__keys)
+
+    def get_distance(self, state):
+        """ Return the number of moves needed to win from a state
+
+        :param state: (tuple) the state (see :meth:`Game.get_state`)
+        :return: (int) the length of a shortest solution from the state, or
+            None if the game can't be won from it (or if the state isn't
+            reachable from the initial state of the table)
+        """
+        code = self.__game.pack(self.__game.canonical(state))
+        position = bisect_left(self.__keys, code)
+
+        if position == len(self.__keys) or self.__keys[position] != code:
+            return None
+
+        distance = self.__distances[position]
+
+        return None if distance == LOST else distance
+
+    def get_best_move(self, state):
+        """ Return the first move of a shortest solution from a state
+
+        :param state: (tuple) the state (see :meth:`Game.get_state`)
+        :return: (tuple) the move (player, direction), or None if the state
+            is winning or the game can't be won from it
+        """
+        distance = self.get_distance(state)
+
+        if not distance:
+            return None
+
+        for num, direction, new_state in self.__game.successors(state):
+            if self.get_distance(new_state) == distance - 1:
+                return num, direction
+
+    def close(self):
+        """ Close the file of the table
+        """
+        self.__keys.release()
+        self.__distances.release()
+        self.__mapping.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute the endgame table of an Ice Walker grid")
+    parser.add_argument("filename", help="the path of the config file")
+    parser.add_argument("table", help="the path of the table to write")
+    args = parser.parse_args()
+
+    game = Game.from_file(args.filename)
+
+    try:
+        table = EndgameTable.build(game, args.table)
+    except ValueError as error:
+        parser.error(error)
+
+    distance = table.get_distance(game.get_state())
+    print("States:", len(table))
+    print("Moves to win:",
+          "not solvable" if distance is None else distance)
+    table.close()
+
+
+if __name__ == "__main__":
+    main()
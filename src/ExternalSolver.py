@@ -0,0 +1,255 @@
+from Bitboard import Bitboard
+from Game import Game
+from Solver import add_search_options, get_layered_path
+from array import array
+from heapq import merge
+import argparse
+import mmap
+import os
+import shutil
+import tempfile
+
+
+# the number of states gathered in memory before being sorted and written
+CHUNK_SIZE = 1 << 20
+
+
+def external_bfs(game, symmetry=False, stats=None, directory=None,
+                 chunk_size=CHUNK_SIZE):
+    """ Find a shortest solution of a game with a breadth-first search
+    keeping the explored states on disk. Each depth of the search is a
+    file of sorted packed states (see :meth:`Game.pack`), read through a
+    memory map. The successors of a depth are sorted by chunks of
+    [chunk_size] states, the chunks are merged, and the states already
+    met are removed by merging the result with the files of all the
+    previous depths. The solution is rebuilt by scanning the files
+    backwards (see :func:`Solver.get_layered_path`). The memory used
+    doesn't depend on the number of states, so it can prove that a game
+    can't be solved even when the states don't fit in memory
+
+    :param game: (Game) the game to solve
+    :param symmetry: (bool) see :func:`Solver.bfs`
+    :param stats: (dict) see :func:`Solver.bfs`
+    :param directory: (str) the directory where the files are written (by
+        default, the temporary directory of the system). They are removed
+        once the search is over
+    :param chunk_size: (int) the number of states sorted in memory at once
+    :return: (list) the moves (player, direction) of the solution, or
+        None if the game can't be solved
+    :raises ValueError: if the states of the game don't fit in 64 bits
+    :Examples:
+
+    With chunks of 4 states, the depths are merged from many files:
+
+    >>> game = Game.from_file('../data/grid4.json')
+    >>> moves = external_bfs(game, chunk_size=4)
+    >>> len(moves)
+    7
+    >>> for num, direction in moves:
+    ...     _ = game.next_step(num, direction)
+    >>> game.winning()
+    True
+    >>> len(external_bfs(Game.from_file('../data/grid1.json'), True,
+    ...                  chunk_size=1000))
+    8
+    >>> external_bfs(Game.from_file('../data/grid2.json'), chunk_size=2)
+    """
+    start = game.get_state()
+    stats = dict() if stats is None else stats
+    stats['expanded'] = 0
+    size = game.get_grid().get_width() * game.get_grid().get_height()
+
+    if size ** len(start) > 2 ** 64:
+        raise ValueError("The states of the game don't fit in 64 bits")
+
+    if game.is_dead(start):
+        return None
+    elif game.is_winning(start):
+        return []
+
+    def key(state):
+        return game.pack(game.canonical(state) if symmetry else state)
+
+    folder = tempfile.mkdtemp(prefix='icewalker-', dir=directory)
+
+    try:
+        layers = [os.path.join(folder, 'layer-0.bin')]
+        _write(layers[0], [key(start)], game)
+        goal = None
+
+        while goal is None:
+            chunks = _expand(game, key, layers[-1], folder, chunk_size, stats)
+            states = _unique(merge(*(_read(chunk) for chunk in chunks)))
+
+            for layer in layers:
+                states = _difference(states, layer)
+
+            layers.append(os.path.join(folder, 'layer-%d.bin' % len(layers)))
+            count, goal = _write(layers[-1], states, game, chunk_size)
+
+            for chunk in chunks:
+                os.remove(chunk)
+
+            if count == 0:
+                return None
+
+        return get_layered_path(game, key,
+                                [_read(layer) for layer in layers[:-1]],
+                                goal)
+
+    finally:
+        shutil.rmtree(folder)
+
+
+def _read(filename):
+    """ Generate the integers of a file of packed states through a memory
+    map
+
+    :param filename: (str) the path of the file
+    :return: (generator) the packed states of the file
+    """
+    if os.path.getsize(filename) == 0:
+        return
+
+    with open(filename, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+        view = memoryview(mapping).cast('Q')
+
+        try:
+            yield from view
+        finally:
+            view.release()
+
+
+def _write(filename, codes, game, chunk_size=CHUNK_SIZE):
+    """ Write packed states into a file
+
+    :param filename: (str) the path of the file
+    :param codes: (iterable) the packed states
+    :param game: (Game) the game the states belong to
+    :param chunk_size: (int) the number of states written at once
+    :return: (tuple) the number of states written and the first winning
+        one (None if there isn't any)
+    """
+    count, goal = 0, None
+    buffer = array('Q')
+
+    with open(filename, 'wb') as file:
+        for code in codes:
+            buffer.append(code)
+
+            if goal is None and game.is_winning(game.unpack(code)):
+                goal = code
+
+            if len(buffer) >= chunk_size:
+                buffer.tofile(file)
+                count += len(buffer)
+                del buffer[:]
+
+        buffer.tofile(file)
+        count += len(buffer)
+
+    return count, goal
+
+
+def _expand(game, key, layer, folder, chunk_size, stats):
+    """ Write the successors of the states of a depth into files of at most
+    [chunk_size] sorted states
+
+    :param game: (Game) the game to solve
+    :param key: (function) the function giving the packed key of a state
+    :param layer: (str) the path of the file of the depth
+    :param folder: (str) the directory of the files
+    :param chunk_size: (int) the maximum number of states of a file
+    :param stats: (dict) the statistics of the search
+    :return: (list) the paths of the files written
+    """
+    chunks, buffer = list(), set()
+
+    def flush():
+        chunks.append(os.path.join(folder, 'chunk-%d.bin' % len(chunks)))
+
+        with open(chunks[-1], 'wb') as file:
+            array('Q', sorted(buffer)).tofile(file)
+
+        buffer.clear()
+
+    for code in _read(layer):
+        stats['expanded'] += 1
+
+        for num, direction, state in game.successors(game.unpack(code)):
+            buffer.add(key(state))
+
+            if len(buffer) >= chunk_size:
+                flush()
+
+    if buffer or not chunks:
+        flush()
+
+    return chunks
+
+
+def _unique(codes):
+    """ Remove the repetitions of a sorted iterable
+
+    :param codes: (iterable) the sorted packed states
+    :return: (generator) the distinct states, in the same order
+    :Examples:
+
+    >>> list(_unique([1, 1, 2, 5, 5, 5]))
+    [1, 2, 5]
+    """
+    previous = None
+
+    for code in codes:
+        if code != previous:
+            yield code
+            previous = code
+
+
+def _difference(codes, filename):
+    """ Remove from a sorted iterable the states of a sorted file
+
+    :param codes: (iterable) the sorted packed states
+    :param filename: (str) the path of the file
+    :return: (generator) the states of [codes] missing from the file
+    """
+    layer = _read(filename)
+    current = next(layer, None)
+
+    for code in codes:
+        while current is not None and current < code:
+            current = next(layer, None)
+
+        if code != current:
+            yield code
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve an Ice Walker grid with a breadth-first search "
+                    "keeping the explored states on disk")
+    parser.add_argument("filename", help="the path of the config file")
+    parser.add_argument("--directory", default=None,
+                        help="where to write the files of the search "
+                             "(default: the temporary directory)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="the number of states sorted in memory at once")
+    add_search_options(parser)
+    args = parser.parse_args()
+
+    engine = Bitboard if args.bitboard else None
+    game = Game.from_file(args.filename, engine)
+    moves = external_bfs(game, args.symmetry, directory=args.directory,
+                         chunk_size=args.chunk_size)
+
+    if moves is None:
+        print("Not solvable")
+        return
+
+    for move in moves:
+        print(move)
+
+
+if __name__ == "__main__":
+    main()
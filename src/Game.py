@@ -1,5 +1,7 @@
+from Board import DIRECTIONS, FINAL, OFFSETS, OPPOSITES, THAWED
 from Grid import Grid
-from copy import deepcopy
+from Player import Player
+from itertools import combinations, permutations
 
 
 class PlayerNotFoundError(Exception):
@@ -27,10 +29,22 @@ class Game:
     False
     """
 
-    def __init__(self, grid):
+    def __init__(self, grid, engine=None):
+        """ Create a new game on a grid
+
+        :param grid: (Grid) the grid of the game
+        :param engine: (class) the move engine used to compute the slides
+            of the solver-facing methods (e.g. :class:`Bitboard.Bitboard`),
+            built over the board of the grid. Defaults to the board itself
+        """
         self.__grid = grid
         self.__players = grid.players
 
+        if engine is None:
+            self.__engine = grid.get_board()
+        else:
+            self.__engine = engine(grid.get_board())
+
     def play(self):
         """ Asks the user for a move and the plays it
 
@@ -125,7 +139,8 @@ class Game:
         return new_x, new_y, blocked
 
     def move_player(self, player, pos, grid):
-        """ Move the player to a new position
+        """ Move the player to a new position. The hash of the grid is
+        updated incrementally (see :meth:`Grid.set_player`)
 
         :param player: (Player) the player to move
         :param pos: (tuple) where to move the player (x, y)
@@ -142,40 +157,72 @@ class Game:
 
     def next_step(self, num, direction):
         """ Move the player in a direction until he reaches a wall, a
-        player or a grid border
+        player, a grid border or a thawed cell. The cell where the player
+        stops is found at once by the move engine, and the player is moved
+        there in a single step, by index (see :meth:`Grid.move_player`)
 
         :param num: (int) the number corresponding to the player to move
         :param direction: (str) the direction where to move the player towards
-        :return: None
+        :return: (dict) the keys 'moved' (True if the player moved), 'from'
+            and 'to' (the coordinates of the player before and after the
+            move) and 'blocked_by' (what stopped the player: 'border',
+            'wall', 'player' or 'thawed', the latter meaning that the player
+            stands on a thawed cell)
         :UC: num >= 0 and direction in {'E', 'N', 'S', 'W'}
-
+        :Examples:
+
+        >>> grid = Grid(4, 2)
+        >>> grid.add_wall([0, 0, 'S'])
+        >>> grid.get_cell(2, 1).thaw()
+        >>> grid.set_player(Player(0, 0, 0))
+        >>> grid.set_player(Player(3, 0, 1))
+        >>> game = Game(grid)
+        >>> game.next_step(0, 'S')['blocked_by']
+        'wall'
+        >>> game.next_step(0, 'E')
+        {'moved': True, 'from': (0, 0), 'to': (2, 0), 'blocked_by': 'player'}
+        >>> game.next_step(0, 'N')
+        {'moved': False, 'from': (2, 0), 'to': (2, 0), 'blocked_by': 'border'}
+        >>> game.next_step(0, 'S')
+        {'moved': True, 'from': (2, 0), 'to': (2, 1), 'blocked_by': 'thawed'}
         """
-        player = self.__players[num]
-        x, y = pos = player.get_coordinates()
-        grid = self.get_grid()
-
-        if not self.player_can_move(pos, direction, grid):
-            return
-        elif grid.get_cell(x, y).is_thawed():
-            return
+        grid = self.__grid
+        board = grid.get_board()
+        state = self.get_state()
+        stop = self.slide(state, num, direction)[num]
+        x, y = board.get_position(state[num])
+        stop_x, stop_y = board.get_position(stop)
+        dx, dy = OFFSETS[direction]
+
+        if board.get_flags(stop) & THAWED:
+            blocked_by = 'thawed'
+        elif not board.is_blocked(stop_x, stop_y, direction):
+            blocked_by = 'player'
+        elif stop_x + dx in range(board.get_width()) and \
+                stop_y + dy in range(board.get_height()):
+            blocked_by = 'wall'
+        else:
+            blocked_by = 'border'
 
-        new_x, new_y, blocked = self.get_new_position(pos, direction, grid)
-        next_cell = grid.get_cell(new_x, new_y)
+        if stop != state[num]:
+            grid.move_player(num, stop)
 
-        if next_cell.is_empty() and not blocked:
-            self.move_player(player, (new_x, new_y), grid)
-            self.next_step(num, direction)
+        return {'moved': stop != state[num],
+                'from': (x, y),
+                'to': (stop_x, stop_y),
+                'blocked_by': blocked_by}
 
     @classmethod
-    def from_file(cls, filename):
+    def from_file(cls, filename, engine=None):
         """ Creates a new game from a grid configuration in a file
 
         :param filename: (str) the path to the grid's file
+        :param engine: (class) the move engine to use (see :meth:`__init__`)
         :return: (Game) a new game
         :UC: filename.endswith(".json")
         """
         grid = Grid.from_file(filename)
-        return cls(grid)
+        return cls(grid, engine)
 
     def winning(self):
         """ Returns a boolean that says whether or not the player
@@ -183,8 +230,7 @@ class Game:
 
         :return: (bool) true if the player wins, false otherwise
         """
-        x, y = self.__players[0].get_coordinates()
-        return self.get_grid().get_cell(x, y).is_final_cell()
+        return self.is_winning(self.get_state())
 
     def losing(self):
         """ Returns a boolean that says whether or not the player
@@ -192,9 +238,7 @@ class Game:
 
         :return: (bool) true if the player loses, false otherwise
         """
-        grid = self.get_grid()
-        coordinates = (p.get_coordinates() for p in self.__players)
-        return any(grid.get_cell(x, y).is_thawed() for (x, y) in coordinates)
+        return self.is_losing(self.get_state())
 
     def get_grid(self):
         """ Get the grid corresponding to the current game
@@ -206,7 +250,8 @@ class Game:
     def explore(self, num, direction):
         """ Explore the game without affecting the current one. It will return
         a new instance of game, generated by exploring the initial one in the
-        direction [direction] with the player [player]
+        direction [direction] with the player [player]. The new game shares
+        the board of the current one: only the players are copied
 
         :param num: (int) the number of the player
         :param direction: (str) the direction to explore
@@ -214,11 +259,53 @@ class Game:
         :UC: n in range(num_of_players)
              direction in {"E", "S", "N", "W"}
         """
-        grid = deepcopy(self.get_grid())
+        grid = self.get_grid().copy()
         g = Game(grid)
         g.next_step(num, direction)
         return g
 
+    def apply(self, num, direction):
+        """ Move the player [num] towards [direction] in the game itself, as
+        :meth:`next_step` does, and return what is needed to cancel the
+        move with :meth:`undo`. Trying moves with apply/undo walks the game
+        tree on a single grid, without copying it as :meth:`explore` does
+
+        :param num: (int) the number of the player
+        :param direction: (str) the direction to move the player towards
+        :return: (tuple) the undo token: the number of the player and the
+            index of its cell before the move
+        :UC: num in range(num_of_players)
+             direction in {'E', 'N', 'S', 'W'}
+        :Examples:
+
+        >>> game = Game.from_file('../data/grid4.json')
+        >>> start = game.get_state()
+        >>> first = game.apply(0, 'S')
+        >>> second = game.apply(0, 'E')
+        >>> game.get_state() != start
+        True
+        >>> game.undo(second)
+        >>> game.undo(first)
+        >>> game.get_state() == start
+        True
+        """
+        state = self.get_state()
+        index = self.slide(state, num, direction)[num]
+
+        if index != state[num]:
+            self.__grid.move_player(num, index)
+
+        return num, state[num]
+
+    def undo(self, token):
+        """ Cancel a move made by :meth:`apply`. The moves must be cancelled
+        in the reverse order they were made
+
+        :param token: (tuple) the token returned by :meth:`apply`
+        """
+        num, index = token
+        self.__grid.move_player(num, index)
+
     def moves(self):
         """ Returns a list containing the grids generated by playing all the players
         of the current grid in all directions.
@@ -234,6 +321,311 @@ class Game:
 
         return grids
 
+    def get_state(self):
+        """ Get the current state of the game, i.e. the tuple of the cell
+        indices of all players (see :meth:`Grid.get_state`)
+
+        :return: (tuple) the state of the game
+        """
+        return self.__grid.get_state()
+
+    def get_hint(self, table):
+        """ Get the best move from the current state of the game, wherever
+        the players have gone since the beginning
+
+        :param table: (EndgameTable) an endgame table built from the initial
+            state of the game (see :meth:`EndgameTable.build`)
+        :return: (tuple) the move (player, direction) starting a shortest
+            solution, or None if the game is won or can't be won anymore
+        """
+        return table.get_best_move(self.get_state())
+
+    def slide(self, state, num, direction):
+        """ Compute the state reached by moving the player [num] towards
+        [direction] from the state [state]. Only the players' positions are
+        read from [state]: walls and thawed cells come from the grid of the
+        game, which is left untouched. With the default engine, the move
+        costs a lookup in the board's slide-stop tables plus a check of the
+        other players
+
+        :param state: (tuple) the state to play from
+        :param num: (int) the number of the player to move
+        :param direction: (str) the direction to move the player towards
+        :return: (tuple) the new state ([state] itself if the player
+            can't move)
+        :UC: num in range(len(state))
+             direction in {'E', 'N', 'S', 'W'}
+        :Examples:
+
+        >>> grid = Grid(4, 4)
+        >>> grid.add_wall([2, 0, 'E'])
+        >>> grid.set_player(Player(0, 0, 0))
+        >>> grid.set_player(Player(0, 3, 1))
+        >>> game = Game(grid)
+        >>> game.get_state()
+        (0, 12)
+        >>> game.slide((0, 12), 0, 'E')
+        (2, 12)
+        >>> game.slide((0, 12), 0, 'S')
+        (8, 12)
+        >>> game.slide((0, 12), 1, 'N')
+        (0, 4)
+        >>> game.get_state()
+        (0, 12)
+        """
+        index = self.__engine.slide(state[num], direction, state)
+
+        if index == state[num]:
+            return state
+
+        return state[:num] + (index,) + state[num+1:]
+
+    def successors(self, state):
+        """ Generates the states reached by playing all the players of
+        [state] in all directions, one at a time. The moves that don't move
+        anything and the states that can't lead to a win (see
+        :meth:`is_dead`) are skipped
+
+        :param state: (tuple) the state to play from
+        :return: (generator) the tuples (num, direction, new_state), where
+            [num] and [direction] are the move that gives [new_state]
+        :Examples:
+
+        >>> grid = Grid(3, 1)
+        >>> grid.get_cell(2, 0).set_final_cell()
+        >>> grid.set_player(Player(1, 0, 0))
+        >>> game = Game(grid)
+        >>> list(game.successors((1,)))
+        [(0, 'E', (2,)), (0, 'W', (0,))]
+        """
+        for num in range(len(state)):
+            for direction in DIRECTIONS:
+                new_state = self.slide(state, num, direction)
+
+                if new_state is not state and not self.is_dead(new_state):
+                    yield num, direction, new_state
+
+    def predecessors(self, state):
+        """ Generates the states from which [state] is reached by a single
+        move, i.e. the reverse of :meth:`successors`: for every player and
+        direction such that the player can have stopped where it stands,
+        the player is put back on each cell it can have started from. The
+        states that can't lead to a win (see :meth:`is_dead`) are skipped
+
+        :param state: (tuple) the state to reach
+        :return: (generator) the tuples (num, direction, previous_state),
+            where [num] and [direction] are the move that gives [state]
+            from [previous_state]
+        :Examples:
+
+        >>> grid = Grid(4, 1)
+        >>> grid.get_cell(0, 0).set_final_cell()
+        >>> game = Game(grid)
+        >>> sorted(game.predecessors((3,)))
+        [(0, 'E', (0,)), (0, 'E', (1,)), (0, 'E', (2,))]
+        >>> sorted(game.predecessors((3, 0)))[2:]
+        [(1, 'W', (3, 1)), (1, 'W', (3, 2))]
+        """
+        board = self.__grid.get_board()
+        thawed = board.get_thawed_cells()
+        occupied = set(state)
+
+        for num in range(len(state)):
+            x, y = board.get_position(state[num])
+
+            for direction in DIRECTIONS:
+                dx, dy = OFFSETS[direction]
+                starts = []
+
+                # walk back against [direction] while the way is free
+                while not board.is_blocked(x, y, OPPOSITES[direction]):
+                    x, y = x - dx, y - dy
+                    index = board.get_index(x, y)
+
+                    if index in occupied or index in thawed:
+                        break
+
+                    starts.append(index)
+
+                x, y = board.get_position(state[num])
+
+                if not starts:
+                    continue
+
+                # the player stops where it stands whatever the start is
+                previous = state[:num] + (starts[0],) + state[num+1:]
+
+                if self.slide(previous, num, direction) != state:
+                    continue
+
+                for index in starts:
+                    previous = state[:num] + (index,) + state[num+1:]
+
+                    if not self.is_dead(previous):
+                        yield num, direction, previous
+
+    def get_winning_states(self, symmetry=False):
+        """ Generates all the states where the main player is on the final
+        cell, the other players being on any other cells
+
+        :param symmetry: (bool) if True, only the canonical states are
+            generated (see :meth:`canonical`)
+        :return: (generator) the winning states
+        :Examples:
+
+        >>> grid = Grid(3, 1)
+        >>> grid.get_cell(1, 0).set_final_cell()
+        >>> grid.set_player(Player(0, 0, 0))
+        >>> grid.set_player(Player(2, 0, 1))
+        >>> list(Game(grid).get_winning_states())
+        [(1, 0), (1, 2)]
+        """
+        board = self.__grid.get_board()
+        final = board.get_index(*board.get_final_cell())
+        size = board.get_width() * board.get_height()
+        cells = [index for index in range(size) if index != final]
+        others = len(self.__players) - 1
+
+        if symmetry:
+            placements = combinations(cells, others)
+        else:
+            placements = permutations(cells, others)
+
+        for placement in placements:
+            yield (final,) + placement
+
+    def is_winning(self, state):
+        """ Returns a boolean that says whether or not the main player is on
+        the final cell in [state]
+
+        :param state: (tuple) the state to check
+        :return: (bool) true if the state is a winning one, false otherwise
+        """
+        return bool(self.__grid.get_board().get_flags(state[0]) & FINAL)
+
+    def is_losing(self, state):
+        """ Returns a boolean that says whether or not a player is on a
+        thawed cell in [state]
+
+        :param state: (tuple) the state to check
+        :return: (bool) true if the state is a losing one, false otherwise
+        """
+        return not self.__grid.get_board().get_thawed_cells().isdisjoint(state)
+
+    def is_dead(self, state):
+        """ Returns a boolean that says whether or not the game is over
+        without being won in [state], or the main player is on a cell from
+        which the final cell can't be reached (see
+        :meth:`Board.get_dead_cells`)
+
+        :param state: (tuple) the state to check
+        :return: (bool) true if [state] can't lead to a win
+        :Examples:
+
+        >>> grid = Grid(3, 1)
+        >>> grid.get_cell(0, 0).set_final_cell()
+        >>> grid.get_cell(1, 0).thaw()
+        >>> game = Game(grid)
+        >>> game.is_dead((0, 1)), game.is_dead((0, 2)), game.is_dead((2, 0))
+        (False, False, True)
+        >>> list(game.successors((2, 0)))
+        []
+        """
+        if state[0] in self.__grid.get_board().get_dead_cells():
+            return True
+
+        return self.is_losing(state) and not self.is_winning(state)
+
+    def pack(self, state):
+        """ Pack a state into a single integer: the number whose digits in
+        base width*height are the cell indices of the players (the main
+        player being the lowest digit). Every state of a game with k
+        players gets a distinct number below (width*height)**k
+
+        :param state: (tuple) the state
+        :return: (int) the packed state
+        :Examples:
+
+        >>> game = Game(Grid(4, 4))
+        >>> game.pack((5, 12))
+        197
+        """
+        size = self.__grid.get_width() * self.__grid.get_height()
+        code = 0
+
+        for index in reversed(state):
+            code = code * size + index
+
+        return code
+
+    def unpack(self, code):
+        """ Unpack a state packed by :meth:`pack`
+
+        :param code: (int) the packed state
+        :return: (tuple) the state
+        :Examples:
+
+        >>> grid = Grid(4, 4)
+        >>> grid.set_player(Player(1, 1, 0))
+        >>> grid.set_player(Player(0, 3, 1))
+        >>> game = Game(grid)
+        >>> game.unpack(197)
+        (5, 12)
+        >>> game.unpack(game.pack(game.get_state())) == game.get_state()
+        True
+        """
+        size = self.__grid.get_width() * self.__grid.get_height()
+        state = []
+
+        for player in self.__players:
+            code, index = divmod(code, size)
+            state.append(index)
+
+        return tuple(state)
+
+    def canonical(self, state):
+        """ Returns the canonical form of a state, where the positions of the
+        players other than the main one are sorted. The other players are
+        only blockers for the main player, so the states having the same
+        canonical form are equivalent: one of them can be solved if and only
+        if all of them can, with as many moves (the numbers of the players
+        being permuted)
+
+        :param state: (tuple) the state
+        :return: (tuple) the canonical form of the state
+        :Examples:
+
+        >>> game = Game(Grid(4, 4))
+        >>> game.canonical((5, 12, 3, 7))
+        (5, 3, 7, 12)
+        """
+        return state[:1] + tuple(sorted(state[1:]))
+
+    def __hash__(self):
+        return hash(self.__grid)
+
+    def __eq__(self, other):
+        """ Two games are equal if their grids are (see :meth:`Grid.__eq__`)
+
+        :param other: (Game) the other game
+        :return: (bool) True if the players of both games stand on the same
+            cells
+        :Examples:
+
+        >>> game = Game.from_file('../data/grid4.json')
+        >>> other = game.explore(0, 'S')
+        >>> game == other
+        False
+        >>> other.next_step(0, 'N')['moved']
+        True
+        >>> game == other, game in {other}
+        (True, True)
+        """
+        if not isinstance(other, Game):
+            return NotImplemented
+
+        return self.__grid == other.__grid
+
     def __str__(self):
         return str(self.__grid)
 
@@ -1,12 +1,115 @@
+from Board import Board
 from Cell import Cell
 from Player import Player
 import json
 from json.decoder import JSONDecodeError
 
 
+MASK = 2 ** 64 - 1
+
+
+def get_zobrist_key(num, index):
+    """ Return the random-looking 64-bit key of the player [num] standing on
+    the cell of index [index]. The hash of a grid (see :meth:`Grid.get_hash`)
+    is the XOR of the keys of its players, so that moving a player only
+    changes two keys of it. The keys are mixed from the number and the
+    index (with the splitmix64 function) rather than drawn at random, so
+    that they are the same in all the processes
+
+    :param num: (int) the number of the player
+    :param index: (int) the index of the cell
+    :return: (int) the key
+    :Examples:
+
+    >>> get_zobrist_key(0, 1) != get_zobrist_key(1, 0)
+    True
+    >>> get_zobrist_key(0, 1) < 2 ** 64
+    True
+    """
+    key = ((num << 32 | index) + 0x9E3779B97F4A7C15) & MASK
+    key = (key ^ key >> 30) * 0xBF58476D1CE4E5B9 & MASK
+    key = (key ^ key >> 27) * 0x94D049BB133111EB & MASK
+    return key ^ key >> 31
+
+
+class GridCell(Cell):
+    """ This class represents a cell of the Grid class. It holds no data of
+    its own: the walls and the thawed/final flags are read from the board
+    of the grid, while the content comes from the occupancy of the grid
+    (the number of the player on each cell, plus one, 0 for an empty
+    cell), so that grids sharing a board never share their players
+
+    :Examples:
+
+    >>> board = Board(2, 2)
+    >>> occupancy = bytearray(4)
+    >>> cell = GridCell(board, occupancy, dict(), 1, 0)
+    >>> cell.thaw()
+    >>> board.is_thawed(1, 0)
+    True
+    >>> cell.set_content(Player(1, 0, 0))
+    >>> cell, occupancy[1]
+    (0|, 1)
+    """
+
+    __slots__ = ('__board', '__occupancy', '__players', '__x', '__y',
+                 '__index')
+
+    def __init__(self, board, occupancy, players, x, y):
+        """ Create a view over the cell of coordinates (x, y)
+
+        :param board: (Board) the board of the grid
+        :param occupancy: (bytearray) the number of the player on each cell
+            of the grid plus one, by index
+        :param players: (dict) the players of the grid, by number
+        :param x: (int) the x coordinate of the cell
+        :param y: (int) the y coordinate of the cell
+        :UC: x in range(board_width) and y in range(board_height)
+        """
+        self.__board = board
+        self.__occupancy = occupancy
+        self.__players = players
+        self.__x, self.__y = x, y
+        self.__index = board.get_index(x, y)
+
+    def is_final_cell(self):
+        return self.__board.is_final_cell(self.__x, self.__y)
+
+    def set_final_cell(self):
+        self.__board.set_final_cell(self.__x, self.__y)
+
+    def is_thawed(self):
+        return self.__board.is_thawed(self.__x, self.__y)
+
+    def thaw(self):
+        self.__board.thaw(self.__x, self.__y)
+
+    def get_content(self):
+        num = self.__occupancy[self.__index]
+        return self.__players[num - 1] if num else None
+
+    def set_content(self, content):
+        if content is None:
+            self.__occupancy[self.__index] = 0
+        else:
+            self.__occupancy[self.__index] = content.get_n() + 1
+            self.__players[content.get_n()] = content
+
+    def add_wall(self, direction):
+        self.__board.add_wall([self.__x, self.__y, direction])
+
+    def get_walls(self):
+        return self.__board.get_walls(self.__x, self.__y)
+
+
 class Grid:
     """ This class represents a Grid of the Ice Walker game, which
-    means the main board on which the players are
+    means the main board on which the players are. The content of the
+    cells is kept in a byte per cell (see :class:`GridCell`). The grid
+    keeps track of where its players are, in the content of its cells and
+    in its hash (see :meth:`get_hash`), so its players must be moved
+    through it, with :meth:`set_player` or :meth:`move_player`, and never
+    with :meth:`Player.set_coordinates` alone
 
     :Examples:
 
@@ -47,18 +150,73 @@ class Grid:
         ValueError: Grid dimensions must be positive integers
         """
 
-        if type(width) != int or type(height) != int:
-            raise TypeError("Grid dimensions must be positive integers")
-        elif width <= 0 or height <= 0:
-            raise ValueError("Grid dimensions must be positive integers")
-
-        self.__width = width
-        self.__height = height
-        self.__grid = [[Cell() for x in range(width)] for y in range(height)]
+        self.__board = Board(width, height)
+        self.__occupancy = bytearray(width * height)
+        # number of a player -> player, for the content of the cells
+        self.__pieces = dict()
+        self.__hash = 0
+        # number of a player -> index of its cell when last set
+        self.__hashed = dict()
         self.players = []
 
-        for line in self.__grid:
-            line[-1].add_wall('E')
+    @classmethod
+    def from_board(cls, board):
+        """ Create a grid without any player on an existing board. The
+        board is shared, not copied: walls, thawed cells and the final
+        cell are common to all the grids created on it
+
+        :param board: (Board) the board of the grid
+        :return: (Grid) a new grid
+        :Examples:
+
+        >>> b = Board(3, 1)
+        >>> b.set_final_cell(0, 0)
+        >>> print(Grid.from_board(b))
+        +-+-+-+
+        |x    |
+        +-+-+-+
+        """
+        grid = cls.__new__(cls)
+        grid.__board = board
+        grid.__occupancy = bytearray(board.get_width() * board.get_height())
+        grid.__pieces = dict()
+        grid.__hash = 0
+        grid.__hashed = dict()
+        grid.players = []
+        return grid
+
+    def get_board(self):
+        """ Return the board (the static part) of the grid
+
+        :return: (Board) the board
+        """
+        return self.__board
+
+    def copy(self):
+        """ Return a copy of the grid. The copy shares the board of the grid
+        and only duplicates the players, so that moving a player in one grid
+        doesn't affect the other
+
+        :return: (Grid) the copy
+        :Examples:
+
+        >>> g = Grid(3, 3)
+        >>> g.set_player(Player(0, 0, 0))
+        >>> g2 = g.copy()
+        >>> g2.get_board() is g.get_board()
+        True
+        >>> g2.move_player(0, 8)
+        >>> g.get_state(), g2.get_state()
+        ((0,), (8,))
+        >>> g.get_cell(0, 0).is_empty(), g2.get_cell(0, 0).is_empty()
+        (False, True)
+        """
+        grid = Grid.from_board(self.__board)
+
+        for player in self.players:
+            grid.set_player(Player(*player.get_coordinates(), player.get_n()))
+
+        return grid
 
     def get_cell(self, x, y):
         """ Return the cell of coordinates (x, y)
@@ -84,19 +242,19 @@ class Grid:
         elif x not in range(self.get_width()) or y not in range(self.get_height()):
             raise ValueError("x and y must be in the grid's dimensions")
 
-        return self.__grid[y][x]
+        return GridCell(self.__board, self.__occupancy, self.__pieces, x, y)
 
     def get_height(self):
         """ Return the height of the grid
         :return: (int) the height
         """
-        return self.__height
+        return self.__board.get_height()
 
     def get_width(self):
         """ Return the width of the grid
         :return: (int) the width
         """
-        return self.__width
+        return self.__board.get_width()
 
     def add_wall(self, wall):
         """ Add a wall to a certain cell
@@ -177,7 +335,11 @@ class Grid:
         return grid
 
     def set_player(self, player):
-        """ Set a player on the grid depending on its coordinates
+        """ Set a player on the grid depending on its coordinates. If the
+        player was already set on the grid, its previous cell is emptied.
+        The hash of the grid (see :meth:`get_hash`) is updated in constant
+        time: the key of the player on its previous cell is replaced by the
+        key of the player on its new cell
 
         :param player: (Player) the player to set on the grid
         :return: None
@@ -191,15 +353,61 @@ class Grid:
         >>> g.set_player(p)
         >>> g.get_cell(2, 4).is_empty()
         False
-
+        >>> p.set_coordinates(2, 0)
+        >>> g.set_player(p)
+        >>> g.get_cell(2, 4).is_empty(), g.get_cell(2, 0).is_empty()
+        (True, False)
         """
         x, y = player.get_coordinates()
+        num, index = player.get_n(), self.get_index(x, y)
+        cell = self.get_cell(x, y)
+
+        if num in self.__hashed:
+            if self.__occupancy[self.__hashed[num]] == num + 1:
+                self.__occupancy[self.__hashed[num]] = 0
+
+            self.__hash ^= get_zobrist_key(num, self.__hashed[num])
+
+        cell.set_content(player)
 
-        self.get_cell(x, y).set_content(player)
+        self.__hash ^= get_zobrist_key(num, index)
+        self.__hashed[num] = index
 
         if player not in self.players:
             self.players.insert(player.get_n(), player)
 
+    def move_player(self, num, index):
+        """ Move the player [num], already set on the grid, to the cell of
+        index [index]. Nothing is checked: this is the fast path of the
+        game engine, whose moves always end on a cell of the grid, while
+        :meth:`set_player` checks the coordinates of the player. The hash
+        of the grid is updated as by :meth:`set_player`
+
+        :param num: (int) the number of the player
+        :param index: (int) the index of the cell to move the player to
+        :UC: the player [num] is on the grid
+             index in range(grid_width * grid_height)
+        :Examples:
+
+        >>> g = Grid(3, 3)
+        >>> g.set_player(Player(0, 0, 0))
+        >>> g.move_player(0, 5)
+        >>> g.players[0].get_coordinates(), g.get_cell(0, 0).is_empty()
+        ((2, 1), True)
+        >>> g.get_hash() == Grid(3, 3).get_hash() ^ get_zobrist_key(0, 5)
+        True
+        """
+        board = self.__board
+        player = self.__pieces[num]
+
+        self.__occupancy[board.get_index(*player.get_coordinates())] = 0
+        player.place(*board.get_position(index))
+        self.__occupancy[index] = num + 1
+
+        self.__hash ^= get_zobrist_key(num, self.__hashed[num]) ^ \
+            get_zobrist_key(num, index)
+        self.__hashed[num] = index
+
     def __str__(self):
         """ Draw the grid
 
@@ -269,7 +477,8 @@ class Grid:
 
         grid = '+-' * self.get_width() + '+' + '\n'  # top border
 
-        for y, line in enumerate(self.__grid):
+        for y in range(self.get_height()):
+            line = [self.get_cell(x, y) for x in range(self.get_width())]
 
             grid += '|'  # left border
 
@@ -341,6 +550,110 @@ class Grid:
         """
         return [player.get_coordinates() for player in self.players]
 
+    def get_index(self, x, y):
+        """ Return the index of the cell of coordinates (x, y) when the cells
+        are numbered line by line, from the top left corner
+
+        :param x: (int) the x coordinate
+        :param y: (int) the y coordinate
+        :return: (int) the index of the cell
+        :UC: x in range(grid_width) and y in range(grid_height)
+        :Examples:
+
+        >>> g = Grid(4, 3)
+        >>> g.get_index(0, 0)
+        0
+        >>> g.get_index(2, 1)
+        6
+        """
+        return self.__board.get_index(x, y)
+
+    def get_position(self, index):
+        """ Return the coordinates of the cell of index [index]
+
+        :param index: (int) the index of the cell
+        :return: (tuple) the coordinates (x, y) of the cell
+        :UC: index in range(grid_width * grid_height)
+        :Examples:
+
+        >>> g = Grid(4, 3)
+        >>> g.get_position(6)
+        (2, 1)
+        """
+        return self.__board.get_position(index)
+
+    def get_state(self):
+        """ Returns a hashable key describing the players' positions: the
+        tuple of the cell indices of all players, ordered by number. Two
+        grids sharing the same walls are in the same state if and only if
+        their keys are equal, which makes the key usable in sets and dicts.
+        The indices are the ones the grid keeps for its hash (see
+        :meth:`set_player` and :meth:`move_player`), so they aren't
+        computed again from the coordinates of the players
+
+        :return: (tuple) the cell indices of all players
+        :Examples:
+
+        >>> grid = Grid(4, 4)
+        >>> grid.set_player(Player(1, 1, 0))
+        >>> grid.set_player(Player(2, 3, 1))
+        >>> grid.get_state()
+        (5, 14)
+        >>> grid.get_state() in {(5, 14)}
+        True
+        """
+        hashed = self.__hashed
+
+        return tuple(hashed[player.get_n()] for player in self.players)
+
+    def get_hash(self):
+        """ Returns the hash of the players' positions, kept up to date by
+        :meth:`set_player` and :meth:`move_player` (a player moved without
+        them is not taken into account)
+
+        :return: (int) the XOR of the keys of the players on their cells
+            (see :func:`get_zobrist_key`)
+        :Examples:
+
+        >>> g1, g2 = Grid(3, 3), Grid(3, 3)
+        >>> p = Player(0, 0, 0)
+        >>> g1.set_player(p)
+        >>> p.set_coordinates(2, 0)
+        >>> g1.set_player(p)
+        >>> g2.set_player(Player(2, 0, 0))
+        >>> g1.get_hash() == g2.get_hash()
+        True
+        """
+        return self.__hash
+
+    def __hash__(self):
+        return self.__hash
+
+    def __eq__(self, other):
+        """ Two grids are equal if their players stand on the same cells (see
+        :meth:`get_state`); the walls are not compared, so only grids of
+        the same board should be compared. The hashes are compared first,
+        the positions only when they are the same
+
+        :param other: (Grid) the other grid
+        :return: (bool) True if the grids are in the same state
+        :Examples:
+
+        >>> g1, g2 = Grid(3, 3), Grid(3, 3)
+        >>> g1.set_player(Player(1, 1, 0))
+        >>> g2.set_player(Player(1, 1, 0))
+        >>> g1 == g2, g1 in {g2}
+        (True, True)
+        >>> g2.set_player(Player(0, 1, 1))
+        >>> g1 == g2
+        False
+        """
+        if not isinstance(other, Grid):
+            return NotImplemented
+
+        return self.__hash == other.__hash and \
+            self.get_state() == other.get_state()
+
     def is_in(self, iterable):
         """ Returns True if the grid is in a set of grids, False otherwise
 
@@ -358,9 +671,11 @@ class Grid:
         >>> g1.set_player(p1)
         >>> g1.is_in([g2])
         True
+        >>> g1.is_in([Grid(3, 3), g2])
+        True
         """
-        return all(self.coord_players() == other.coord_players()
-                   for other in iterable)
+        state = self.get_state()
+        return any(state == other.get_state() for other in iterable)
 
     def get_move_to(self, other):
         """ Get the move to go from a grid to another
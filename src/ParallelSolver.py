@@ -0,0 +1,277 @@
+from Bitboard import Bitboard
+from Game import Game
+from Solver import add_search_options, decode_move, encode_move
+from array import array
+from multiprocessing import Pipe, Process, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import argparse
+import os
+
+
+# the largest packed state, kept to mark the initial state in the tables
+NO_PARENT = 2 ** 64 - 1
+
+
+def get_owner(code, workers):
+    """ Return the number of the worker owning a packed state. The code
+    is mixed before taking the remainder, so that the states are spread
+    evenly even when the number of workers divides the size of the board
+
+    :param code: (int) the packed state
+    :param workers: (int) the number of workers
+    :return: (int) the number of the owner
+    :Examples:
+
+    >>> [get_owner(code, 4) for code in range(0, 16, 4)]
+    [0, 1, 3, 1]
+    """
+    return (code * 0x9E3779B97F4A7C15 >> 32 & 0xFFFFFFFF) % workers
+
+
+def parallel_bfs(game, symmetry=False, stats=None, workers=None):
+    """ Find a shortest solution of a game with a breadth-first search
+    spread over several processes. The states are packed into integers
+    (see :meth:`Game.pack`) and shared out between the workers by hash:
+    each worker keeps the visited states it owns, with their parents. The
+    search goes one depth at a time: every worker expands its part of the
+    frontier and writes the successors, sorted by owner, in a shared
+    memory block, then every worker merges the successors it owns into
+    its visited table to make its part of the next frontier
+
+    :param game: (Game) the game to solve
+    :param symmetry: (bool) see :func:`Solver.bfs`
+    :param stats: (dict) see :func:`Solver.bfs`
+    :param workers: (int) the number of worker processes (by default, the
+        number of processors of the machine)
+    :return: (list) the moves (player, direction) of the solution, or
+        None if the game can't be solved
+    :raises ValueError: if the states of the game don't fit in 64 bits
+    :Examples:
+
+    >>> game = Game.from_file('../data/grid4.json')
+    >>> moves = parallel_bfs(game, workers=3)
+    >>> len(moves)
+    7
+    >>> for num, direction in moves:
+    ...     _ = game.next_step(num, direction)
+    >>> game.winning()
+    True
+    >>> len(parallel_bfs(Game.from_file('../data/grid1.json'), True,
+    ...                  workers=2))
+    8
+    >>> parallel_bfs(Game.from_file('../data/grid2.json'), workers=2) is None
+    True
+    """
+    start = game.get_state()
+    stats = dict() if stats is None else stats
+    stats['expanded'] = 0
+    size = game.get_grid().get_width() * game.get_grid().get_height()
+
+    if size ** len(start) >= NO_PARENT:
+        raise ValueError("The states of the game don't fit in 64 bits")
+
+    if game.is_dead(start):
+        return None
+    elif game.is_winning(start):
+        return []
+
+    workers = workers or os.cpu_count()
+    connections, processes = list(), list()
+    # the workers must share one tracker of the shared memory blocks, so
+    # that a block is forgotten once unlinked by its writer
+    resource_tracker.ensure_running()
+
+    for number in range(workers):
+        connection, worker_connection = Pipe()
+        process = Process(target=_work, daemon=True,
+                          args=(game, symmetry, number, workers,
+                                worker_connection))
+        process.start()
+        connections.append(connection)
+        processes.append(process)
+
+    try:
+        key = game.pack(game.canonical(start) if symmetry else start)
+        connections[get_owner(key, workers)].send(
+            ('start', (game.pack(start), key)))
+        goal = None
+
+        while goal is None:
+            for connection in connections:
+                connection.send(('expand', None))
+
+            # incoming[i]: the successors produced for the worker i
+            incoming = [list() for connection in connections]
+
+            for connection in connections:
+                name, slices, expanded = connection.recv()
+                stats['expanded'] += expanded
+
+                for owner, (offset, count) in enumerate(slices):
+                    if count:
+                        incoming[owner].append((name, offset, count))
+
+            for owner, connection in enumerate(connections):
+                connection.send(('merge', incoming[owner]))
+
+            new_states = 0
+
+            for connection in connections:
+                count, winning = connection.recv()
+                new_states += count
+
+                if winning is not None and goal is None:
+                    goal = winning
+
+            if new_states == 0:
+                return None
+
+        moves = list()
+
+        while True:
+            connections[get_owner(goal, workers)].send(('parent', goal))
+            goal, move = connections[get_owner(goal, workers)].recv()
+
+            if goal == NO_PARENT:
+                break
+
+            moves.append(decode_move(move))
+
+        moves.reverse()
+
+        return moves
+
+    finally:
+        for connection in connections:
+            connection.send(('stop', None))
+
+        for process in processes:
+            process.join()
+
+
+def _work(game, symmetry, number, workers, connection):
+    """ The loop of a worker of :func:`parallel_bfs`, answering the
+    commands received through its connection:
+
+    - ('start', (code, key)): own the initial state
+    - ('expand', None): expand the frontier, write the successors in a
+      shared memory block and send back the name of the block, the
+      (offset, count) of the successors of each owner in it and the number
+      of expanded states. Each successor is written as four integers: the
+      packed state, its key (its packed canonical form with symmetry), the
+      key of its parent and its move
+    - ('merge', slices): read the successors owned in the given
+      (name, offset, count) slices, keep the new ones as the next frontier
+      and send back their number and the key of a winning one (or None)
+    - ('parent', key): send back the key of the parent and the move of an
+      owned state
+    - ('stop', None): release the memory and end
+
+    :param game: (Game) the game to solve
+    :param symmetry: (bool) see :func:`parallel_bfs`
+    :param number: (int) the number of the worker
+    :param workers: (int) the number of workers
+    :param connection: (Connection) the connection to the main process
+    """
+    # key -> (key of the parent, move)
+    visited = dict()
+    frontier = array('Q')
+    block = None
+
+    while True:
+        command, argument = connection.recv()
+
+        if command == 'start':
+            code, key = argument
+            visited[key] = (NO_PARENT, 0)
+            frontier.append(code)
+
+        elif command == 'expand':
+            if block is not None:
+                block.close()
+                block.unlink()
+
+            buckets = [array('Q') for owner in range(workers)]
+
+            for code in frontier:
+                config = game.unpack(code)
+                parent = game.pack(game.canonical(config)) if symmetry \
+                    else code
+
+                for num, direction, state in game.successors(config):
+                    state_code = game.pack(state)
+                    key = game.pack(game.canonical(state)) if symmetry \
+                        else state_code
+                    buckets[get_owner(key, workers)].extend(
+                        (state_code, key, parent, encode_move(num, direction)))
+
+            block = SharedMemory(create=True, size=max(
+                1, sum(len(bucket) for bucket in buckets) * 8))
+            slices, offset = list(), 0
+
+            for bucket in buckets:
+                block.buf[offset * 8:(offset + len(bucket)) * 8] = \
+                    bucket.tobytes()
+                slices.append((offset, len(bucket)))
+                offset += len(bucket)
+
+            connection.send((block.name, slices, len(frontier)))
+
+        elif command == 'merge':
+            frontier, winning = array('Q'), None
+
+            for name, offset, count in argument:
+                data = array('Q')
+                shared = SharedMemory(name=name)
+                data.frombytes(shared.buf[offset * 8:(offset + count) * 8])
+                shared.close()
+
+                for i in range(0, len(data), 4):
+                    code, key, parent, move = data[i:i+4]
+
+                    if key not in visited:
+                        visited[key] = (parent, move)
+                        frontier.append(code)
+
+                        if winning is None and \
+                                game.is_winning(game.unpack(code)):
+                            winning = key
+
+            connection.send((len(frontier), winning))
+
+        elif command == 'parent':
+            connection.send(visited[argument])
+
+        elif command == 'stop':
+            if block is not None:
+                block.close()
+                block.unlink()
+
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve an Ice Walker grid with a breadth-first search "
+                    "spread over several processes")
+    parser.add_argument("filename", help="the path of the config file")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="the number of worker processes (default: the "
+                             "number of processors)")
+    add_search_options(parser)
+    args = parser.parse_args()
+
+    engine = Bitboard if args.bitboard else None
+    game = Game.from_file(args.filename, engine)
+    moves = parallel_bfs(game, args.symmetry, workers=args.workers)
+
+    if moves is None:
+        print("Not solvable")
+        return
+
+    for move in moves:
+        print(move)
+
+
+if __name__ == "__main__":
+    main()
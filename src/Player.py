@@ -11,6 +11,8 @@ class Player:
     0
     """
 
+    __slots__ = ('__x', '__y', '__n')
+
     def __init__(self, x, y, n):
         """ Creates a new icewalker Player
 
@@ -80,6 +82,24 @@ class Player:
 
         self.__x, self.__y = x, y
 
+    def place(self, x, y):
+        """ Set the coordinates of the player without checking them. This is
+        the fast path of the game engine, whose moves always end on a cell
+        of the grid; coordinates coming from elsewhere go through
+        :meth:`set_coordinates`
+
+        :param x: (int) the x coordinate
+        :param y: (int) the y coordinate
+        :UC: x >= 0 and y >= 0
+        :Examples:
+
+        >>> p = Player(3, 2, 0)
+        >>> p.place(1, 1)
+        >>> p.get_coordinates()
+        (1, 1)
+        """
+        self.__x, self.__y = x, y
+
     def get_n(self):
         """ Return the number of the player
 
@@ -1,54 +1,908 @@
+from Bitboard import Bitboard
+from Board import DIRECTIONS, OPPOSITES, load_tables
+from Cache import DEFAULT_PATH, open_cache
 from Game import Game
-from queue import Queue
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+from math import comb, perm
+from time import perf_counter
+import argparse
+import os
+import sys
 
-def main():
-    try:
-        filename = sys.argv[1]
-    except IndexError:
-        exit("Error: you have to enter a filename")
 
-    game = Game.from_file(filename)
+# the maximum number of winning states a bidirectional search starts from
+MAX_GOALS = 500000
 
-    queue = Queue()
-    visited = dict()
-    config = game.get_grid()
-    queue.put(config)
-    solved = False
-    visited[config] = None
+# the largest number of states a bitset search marks (128 MiB of bits)
+MAX_BITSET = 2 ** 30
 
-    while not queue.empty() and not solved:
-        config = queue.get()
-        game = Game(config)
+# the largest number of states in the transposition table of iddfs and idastar
+TABLE_SIZE = 100000
 
-        for grid in game.moves():
-            game_bis = Game(grid)
 
-            if not grid.is_in(visited):
-                if game_bis.winning():
-                    solved = True
-                    solution = grid
+def encode_move(num, direction):
+    """ Pack a move into a byte
 
-                visited[grid] = config
-                queue.put(grid)
+    :param num: (int) the number of the player
+    :param direction: (str) the direction
+    :return: (int) the byte of the move
+    :UC: num in range(64) and direction in {'E', 'N', 'S', 'W'}
+    :Examples:
 
-    if not solved:
-        print("Not solvable")
-        return
-        
+    >>> encode_move(2, 'E')
+    10
+    >>> decode_move(encode_move(2, 'E'))
+    (2, 'E')
+    """
+    return num * 4 + DIRECTIONS.index(direction)
+
+
+def decode_move(byte):
+    """ Unpack a move packed by :func:`encode_move`
+
+    :param byte: (int) the byte of the move
+    :return: (tuple) the move (player, direction)
+    """
+    return byte // 4, DIRECTIONS[byte % 4]
+
+
+def get_path(parents, moves, solution):
+    """ Rebuild the moves leading to a state from the parent arrays of a
+    search, where every explored state is identified by the rank in which
+    it was found (the initial state having the id 0)
+
+    :param parents: (array) the i-th element is the id of the state the
+        state of id i was reached from (-1 for the initial state)
+    :param moves: (bytearray) the i-th element is the move (see
+        :func:`encode_move`) that reached the state of id i
+    :param solution: (int) the id of the state to reach
+    :return: (list) the moves (player, direction) leading to the state
+    :Examples:
+
+    >>> get_path(array('q', [-1, 0, 1]), bytes([0, 10, 1]), 2)
+    [(2, 'E'), (0, 'S')]
+    """
     path = list()
 
-    while solution in visited:
-        path.append(solution)
-        solution = visited[solution]
+    while parents[solution] != -1:
+        path.append(decode_move(moves[solution]))
+        solution = parents[solution]
 
     path.reverse()
 
-    for i in range(len(path) - 1):
-        comp = path[i].get_move_to(path[i+1])
-        print(comp)
+    return path
+
+
+def get_layered_path(game, key, layers, goal):
+    """ Rebuild the moves leading to a state from the depths of a search
+    that only kept its states, without parents: going back from the state,
+    a state of each previous depth leading to the current one is looked
+    for. The moves are then replayed from the initial state, so that the
+    players keep their real numbers even if the states were canonical
+
+    :param game: (Game) the solved game
+    :param key: (function) the function giving the packed key (see
+        :meth:`Game.pack`) of a state
+    :param layers: (list) the i-th element is an iterable of the keys of
+        the states at depth i (each one is iterated at most once)
+    :param goal: (int) the key of the state to reach, at depth len(layers)
+    :return: (list) the moves (player, direction) leading to the state
+    """
+    keys = [goal]
+
+    for layer in reversed(layers):
+        for code in layer:
+            if any(key(state) == keys[-1]
+                   for num, direction, state in
+                   game.successors(game.unpack(code))):
+                keys.append(code)
+                break
+
+    keys.reverse()
+
+    state, moves = game.get_state(), list()
+
+    for target in keys[1:]:
+        for num, direction, new_state in game.successors(state):
+            if key(new_state) == target:
+                moves.append((num, direction))
+                state = new_state
+                break
+
+    return moves
+
+
+def bfs(game, symmetry=False, stats=None):
+    """ Find a shortest solution of a game with a breadth-first search
+
+    :param game: (Game) the game to solve
+    :param symmetry: (bool) if True, the states equal up to a permutation
+        of the players other than the main one are explored only once
+        (see :meth:`Game.canonical`)
+    :param stats: (dict) if given, its key 'expanded' is set to the number
+        of states whose successors were generated
+    :return: (list) the moves (player, direction) of the solution, or
+        None if the game can't be solved. With [symmetry], the moves still
+        use the real numbers of the players
+    :Examples:
+
+    >>> from Grid import Grid
+    >>> from Player import Player
+    >>> grid = Grid(5, 2)
+    >>> grid.get_cell(2, 0).set_final_cell()
+    >>> for player in (Player(0, 0, 0), Player(4, 1, 1), Player(3, 1, 2)):
+    ...     grid.set_player(player)
+    >>> game = Game(grid)
+    >>> game.canonical(game.get_state())
+    (0, 8, 9)
+    >>> moves = bfs(game, symmetry=True)
+    >>> moves
+    [(2, 'N'), (0, 'E')]
+    >>> for num, direction in moves:
+    ...     _ = game.next_step(num, direction)
+    >>> game.winning()
+    True
+    """
+    start = game.get_state()
+    stats = dict() if stats is None else stats
+    stats['expanded'] = 0
+
+    if game.is_dead(start):
+        return None
+    elif game.is_winning(start):
+        return []
+
+    # key of a state -> id of the state (see get_path)
+    ids = {game.canonical(start) if symmetry else start: 0}
+    parents = array('q', [-1])
+    moves = bytearray(1)
+    queue = deque([(0, start)])
+
+    while queue:
+        config_id, config = queue.popleft()
+        stats['expanded'] += 1
+
+        for num, direction, state in game.successors(config):
+            key = game.canonical(state) if symmetry else state
+
+            if key not in ids:
+                ids[key] = state_id = len(parents)
+                parents.append(config_id)
+                moves.append(encode_move(num, direction))
+
+                if game.is_winning(state):
+                    return get_path(parents, moves, state_id)
+
+                queue.append((state_id, state))
+
+    return None
+
+
+def astar(game, symmetry=False, stats=None):
+    """ Find a shortest solution of a game with an A* search, guided by
+    the distances of the main player to the final cell (see
+    :meth:`Board.get_distances`). The heuristic never overestimates and is
+    consistent, so the first winning state taken out of the queue is
+    reached by a shortest solution
+
+    :param game: (Game) the game to solve
+    :param symmetry: (bool) see :func:`bfs`
+    :param stats: (dict) see :func:`bfs`
+    :return: (list) the moves (player, direction) of the solution, or
+        None if the game can't be solved
+    :Examples:
+
+    >>> stats = dict()
+    >>> len(astar(Game.from_file('../data/grid4.json'), stats=stats))
+    7
+    >>> bfs_stats = dict()
+    >>> len(bfs(Game.from_file('../data/grid4.json'), stats=bfs_stats))
+    7
+    >>> stats['expanded'] < bfs_stats['expanded']
+    True
+    >>> astar(Game.from_file('../data/grid2.json')) is None
+    True
+    """
+    distances = game.get_grid().get_board().get_distances()
+    start = game.get_state()
+    stats = dict() if stats is None else stats
+    stats['expanded'] = 0
+
+    if game.is_dead(start):
+        return None
+
+    ids = {game.canonical(start) if symmetry else start: 0}
+    parents = array('q', [-1])
+    moves = bytearray(1)
+    costs = array('l', [0])
+    # (estimated length, -number of moves, id, state): among the states of
+    # same estimation, the deepest ones are expanded first
+    queue = [(distances[start[0]], 0, 0, start)]
+
+    while queue:
+        estimation, cost, config_id, config = heappop(queue)
+        cost = -cost
+
+        if cost > costs[config_id]:
+            continue
+
+        if game.is_winning(config):
+            return get_path(parents, moves, config_id)
+
+        stats['expanded'] += 1
+
+        for num, direction, state in game.successors(config):
+            key = game.canonical(state) if symmetry else state
+            state_id = ids.get(key)
+
+            if state_id is None:
+                ids[key] = state_id = len(parents)
+                parents.append(config_id)
+                moves.append(encode_move(num, direction))
+                costs.append(cost + 1)
+            elif cost + 1 < costs[state_id]:
+                parents[state_id] = config_id
+                moves[state_id] = encode_move(num, direction)
+                costs[state_id] = cost + 1
+            else:
+                continue
+
+            heappush(queue, (cost + 1 + distances[state[0]], -(cost + 1),
+                             state_id, state))
+
+    return None
+
+
+def idastar(game, symmetry=False, stats=None, table_size=TABLE_SIZE):
+    """ Find a shortest solution of a game with an iterative deepening A*
+    search: a series of depth-first searches, each one cutting the
+    branches whose estimated length (see :func:`astar`) exceeds a bound,
+    the bound growing to the smallest exceeding estimation until a
+    solution is found. The moves are ordered and pruned, and the states
+    already searched are skipped, as in :func:`iddfs`, so only the current
+    path and a bounded table of states are kept in memory
+
+    :param game: (Game) the game to solve
+    :param symmetry: (bool) see :func:`bfs`
+    :param stats: (dict) see :func:`bfs`
+    :param table_size: (int) see :func:`iddfs`
+    :return: (list) the moves (player, direction) of the solution, or
+        None if the game can't be solved
+    :Examples:
+
+    >>> len(idastar(Game.from_file('../data/grid4.json')))
+    7
+    >>> len(idastar(Game.from_file('../data/grid5.json')))
+    16
+    >>> idastar(Game.from_file('../data/grid2.json')) is None
+    True
+
+    The players can go round in circles forever on this board, but the
+    table shows when all the states were met:
+
+    >>> from Grid import Grid
+    >>> from Player import Player
+    >>> grid = Grid(3, 3)
+    >>> grid.get_cell(1, 1).set_final_cell()
+    >>> grid.set_player(Player(0, 0, 0))
+    >>> grid.set_player(Player(1, 0, 1))
+    >>> idastar(Game(grid)) is None
+    True
+    """
+    stats = dict() if stats is None else stats
+    stats['expanded'] = 0
+    distances = game.get_grid().get_board().get_distances()
+
+    return _iterative_deepening(game, distances, symmetry, stats, table_size)
+
+
+def iddfs(game, symmetry=False, stats=None, table_size=TABLE_SIZE):
+    """ Find a shortest solution of a game with an iterative deepening
+    depth-first search: a series of depth-first searches, each one going
+    one move deeper than the previous one, until a solution is found. The
+    main player is moved first, towards the final cell first, and a player
+    is never moved back right after its move (which can only give back the
+    previous state or a state reached by moving it back at once). A small
+    transposition table skips the states already searched at least as
+    deep during the current depth, so the memory used only grows with the
+    length of the solution. As long as the table isn't full, it holds
+    exactly the states that can be reached before the last move of the
+    depth: if it doesn't grow from one depth to the next one, all the
+    states were met and the game can't be solved. Once it is full, the
+    search only stops when no branch is cut by the depth or the depth
+    exceeds the longest possible shortest solution (see
+    :func:`_max_length`), which can take a time exponential in the
+    number of states
+
+    :param game: (Game) the game to solve
+    :param symmetry: (bool) see :func:`bfs`
+    :param stats: (dict) see :func:`bfs`
+    :param table_size: (int) the largest number of states in the table
+        (the states met once it is full aren't added)
+    :return: (list) the moves (player, direction) of the solution, or
+        None if the game can't be solved
+    :Examples:
+
+    >>> len(iddfs(Game.from_file('../data/grid4.json')))
+    7
+    >>> len(iddfs(Game.from_file('../data/grid4.json'), table_size=10))
+    7
+
+    >>> iddfs(Game.from_file('../data/grid2.json')) is None
+    True
+
+    Here the players can go round in circles forever, so every depth
+    has cut-off branches: the search ends because the states met stop
+    growing after depth 7:
+
+    >>> from Grid import Grid
+    >>> from Player import Player
+    >>> grid = Grid(3, 3)
+    >>> grid.get_cell(1, 1).set_final_cell()
+    >>> grid.set_player(Player(0, 0, 0))
+    >>> grid.set_player(Player(1, 0, 1))
+    >>> bfs(Game(grid)), iddfs(Game(grid))
+    (None, None)
+
+    With a table of 2 states, the same rule can't be used, and a smaller
+    board is needed for the search to end in a reasonable time:
+
+    >>> grid = Grid(3, 2)
+    >>> grid.add_wall([1, 0, 'E'])
+    >>> grid.add_wall([1, 0, 'S'])
+    >>> grid.get_cell(2, 0).set_final_cell()
+    >>> grid.set_player(Player(0, 0, 0))
+    >>> grid.set_player(Player(1, 1, 1))
+    >>> bfs(Game(grid)), iddfs(Game(grid), table_size=2)
+    (None, None)
+    """
+    stats = dict() if stats is None else stats
+    stats['expanded'] = 0
+    size = game.get_grid().get_width() * game.get_grid().get_height()
+
+    return _iterative_deepening(game, [0] * size, symmetry, stats,
+                                table_size)
+
+
+def _iterative_deepening(game, distances, symmetry, stats, table_size):
+    """ Run the depth-first searches of :func:`iddfs` and :func:`idastar`,
+    the bound growing until a solution is found or the game is proven
+    unsolvable. The estimation of a state can exceed the number of moves
+    it has been reached with by at most the largest distance, so if a
+    reachable state hasn't been searched at some bound, one is searched
+    once the bound has grown by that distance plus one. Thus, as long as
+    the table isn't full, the game can't be solved if the table didn't
+    grow since such a smaller bound (the previous depth for :func:`iddfs`)
+
+    :param game: (Game) the game to solve
+    :param distances: (list) the distances of the board to the final cell
+        (see :meth:`Board.get_distances`), or zeros for :func:`iddfs`
+    :param symmetry: (bool) see :func:`bfs`
+    :param stats: (dict) the statistics of the search
+    :param table_size: (int) the largest number of states in the table
+    :return: (list) the moves (player, direction) of the solution, or
+        None if the game can't be solved
+    """
+    start = game.get_state()
+
+    if game.is_dead(start):
+        return None
+
+    spread = max(distance for distance in distances if distance is not None)
+    longest = _max_length(game, symmetry)
+    canonical = game.canonical if symmetry else None
+    path, moves = [start], []
+    on_path = {game.canonical(start) if symmetry else start}
+    bound = distances[start[0]]
+    # the bound and the final size of the table of each previous search
+    sizes = list()
+
+    while bound is not None and bound <= longest:
+        table = dict()
+        result = _deepening_search(game, distances, canonical, path, on_path,
+                                   moves, table, table_size, bound, stats)
+
+        if result is True:
+            return moves
+        elif len(table) < table_size and \
+                any(size == len(table) and previous + spread < bound
+                    for previous, size in sizes):
+            return None
+
+        sizes.append((bound, len(table)))
+        bound = result
+
+    return None
+
+
+def _max_length(game, symmetry):
+    """ Return the largest possible length of a shortest solution of a
+    game. A shortest solution never goes twice through the same state, and
+    all its states but the last one have the main player on a cell that is
+    neither dead, thawed nor final and the other players on cells that
+    aren't thawed, so it can't be longer than the number of such states
+
+    :param game: (Game) the game
+    :param symmetry: (bool) if True, the states equal up to a permutation
+        of the players other than the main one count as one
+    :return: (int) the largest length
+    :Examples:
+
+    >>> from Grid import Grid
+    >>> from Player import Player
+    >>> grid = Grid(3, 2)
+    >>> grid.get_cell(2, 0).set_final_cell()
+    >>> grid.get_cell(0, 1).thaw()
+    >>> for player in (Player(0, 0, 0), Player(1, 1, 1), Player(2, 1, 2)):
+    ...     grid.set_player(player)
+    >>> _max_length(Game(grid), False), _max_length(Game(grid), True)
+    (48, 24)
+    """
+    board = game.get_grid().get_board()
+    size = board.get_width() * board.get_height()
+    thawed = board.get_thawed_cells()
+    dead = board.get_dead_cells()
+    final = board.get_index(*board.get_final_cell())
+    cells = sum(1 for index in range(size) if index not in thawed and
+                index not in dead and index != final)
+    free = size - len(thawed) - 1
+    others = len(game.get_state()) - 1
+
+    return cells * (comb(free, others) if symmetry else perm(free, others))
+
+
+def _deepening_search(game, distances, canonical, path, on_path, moves,
+                      table, table_size, bound, stats):
+    """ Depth-first search of a solution whose estimated length is at most
+    [bound] from the last state of [path]
+
+    :param game: (Game) the game to solve
+    :param distances: (list) the distances of the board to the final cell
+    :param canonical: (function) the function giving the key of a state,
+        or None if the states are their own keys
+    :param path: (list) the states from the initial one to the current one
+    :param on_path: (set) the keys of the states of [path]
+    :param moves: (list) the moves between the states of [path]
+    :param table: (dict) the key of each state already searched -> the
+        number of moves it was searched with and the result of the search
+    :param table_size: (int) the largest number of states in [table]
+    :param bound: (int) the maximum estimated length of a solution
+    :param stats: (dict) the statistics of the search
+    :return: (bool or int) True if a solution was found (it is then in
+        [moves]), otherwise the smallest estimation exceeding [bound] (or
+        a smaller one still exceeding it), or None if no state was cut by
+        the bound
+    """
+    config = path[-1]
+
+    if game.is_winning(config):
+        return True
+
+    estimation = len(moves) + distances[config[0]]
+
+    if estimation > bound:
+        return estimation
+    elif len(moves) == bound:
+        return bound + 1
+
+    key = config if canonical is None else canonical(config)
+    remaining = bound - len(moves)
+
+    if key in table and table[key][0] >= remaining:
+        return table[key][1]
+
+    board = game.get_grid().get_board()
+    x, y = board.get_position(config[0])
+    final_x, final_y = board.get_final_cell()
+    towards = {'E' if final_x > x else 'W' if final_x < x else None,
+               'S' if final_y > y else 'N' if final_y < y else None}
+    last = moves[-1] if moves else None
+    result = None
+    stats['expanded'] += 1
+
+    for num, direction, state in sorted(
+            game.successors(config),
+            key=lambda move: (move[0], move[0] == 0 and
+                              move[1] not in towards)):
+        if last == (num, OPPOSITES[direction]):
+            continue
+
+        state_key = state if canonical is None else canonical(state)
+
+        if state_key in on_path:
+            continue
+
+        path.append(state)
+        on_path.add(state_key)
+        moves.append((num, direction))
+
+        found = _deepening_search(game, distances, canonical, path, on_path,
+                                  moves, table, table_size, bound, stats)
+
+        if found is True:
+            return True
+
+        path.pop()
+        on_path.remove(state_key)
+        moves.pop()
+
+        if found is not None and (result is None or found < result):
+            result = found
+
+    if key in table or len(table) < table_size:
+        table[key] = (remaining, result)
+
+    return result
+
+
+def bidirectional(game, symmetry=False, stats=None, max_goals=MAX_GOALS):
+    """ Find a shortest solution of a game with a bidirectional
+    breadth-first search: a forward search from the initial state and a
+    backward search from all the winning states (see
+    :meth:`Game.predecessors`) are expanded one whole depth at a time,
+    the smaller frontier first, until they meet. Each search then goes
+    about half as deep as a plain breadth-first search
+
+    :param game: (Game) the game to solve
+    :param symmetry: (bool) see :func:`bfs`
+    :param stats: (dict) see :func:`bfs`. Its key 'method' is set to the
+        search actually used, 'bidirectional' or 'bfs'
+    :param max_goals: (int) the maximum number of winning states to start
+        the backward search from. There is one for every placement of the
+        other players on the (width * height - 1) other cells, that is
+        perm(width * height - 1, players - 1) of them (comb(...) with
+        [symmetry]), so when they are too many the game is solved with
+        :func:`bfs` instead
+    :return: (list) the moves (player, direction) of the solution, or
+        None if the game can't be solved
+    :Examples:
+
+    >>> stats = dict()
+    >>> len(bidirectional(Game.from_file('../data/grid4.json'), stats=stats))
+    7
+    >>> stats['method']
+    'bidirectional'
+    >>> bidirectional(Game.from_file('../data/grid2.json')) is None
+    True
+    >>> len(bidirectional(Game.from_file('../data/grid4.json'), stats=stats,
+    ...                   max_goals=10))
+    7
+    >>> stats['method']
+    'bfs'
+    """
+    start = game.get_state()
+    stats = dict() if stats is None else stats
+    stats['expanded'] = 0
+    stats['method'] = 'bidirectional'
+
+    if game.is_dead(start):
+        return None
+    elif game.is_winning(start):
+        return []
+
+    size = game.get_grid().get_width() * game.get_grid().get_height()
+    others = len(start) - 1
+    goals = comb(size - 1, others) if symmetry else perm(size - 1, others)
+
+    if goals > max_goals:
+        stats['method'] = 'bfs'
+        return bfs(game, symmetry, stats)
+
+    def key(state):
+        return game.canonical(state) if symmetry else state
+
+    # key -> (state, key of the next state towards the other end of the
+    # search, move between both states, depth)
+    forward = {key(start): (start, None, None, 0)}
+    backward = {key(goal): (goal, None, None, 0)
+                for goal in game.get_winning_states(symmetry)}
+    forward_frontier = [start]
+    backward_frontier = [goal for goal, _, _, _ in backward.values()]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            stats['expanded'] += len(forward_frontier)
+            forward_frontier, meetings = _expand_layer(
+                game.successors, key, forward_frontier, forward, backward)
+        else:
+            stats['expanded'] += len(backward_frontier)
+            backward_frontier, meetings = _expand_layer(
+                game.predecessors, key, backward_frontier, backward, forward)
+
+        if meetings:
+            meeting = min(meetings,
+                          key=lambda k: forward[k][3] + backward[k][3])
+            return _join_paths(forward, backward, meeting)
+
+    return None
+
+
+def _expand_layer(neighbours, key, frontier, visited, others):
+    """ Expand a whole depth of one side of a bidirectional search
+
+    :param neighbours: (function) the function generating the moves
+        (num, direction, state) of a state on this side
+    :param key: (function) the function giving the key of a state
+    :param frontier: (list) the states of the last depth of this side
+    :param visited: (dict) the table of the states of this side (see
+        :func:`bidirectional`), updated with the new states
+    :param others: (dict) the table of the states of the other side
+    :return: (tuple) the list of the new states and the list of the keys
+        of those of them already reached by the other side
+    """
+    new_frontier, meetings = list(), list()
+
+    for config in frontier:
+        config_key = key(config)
+        depth = visited[config_key][3]
+
+        for num, direction, state in neighbours(config):
+            state_key = key(state)
+
+            if state_key not in visited:
+                visited[state_key] = (state, config_key, (num, direction),
+                                      depth + 1)
+                new_frontier.append(state)
+
+                if state_key in others:
+                    meetings.append(state_key)
+
+    return new_frontier, meetings
+
+
+def _join_paths(forward, backward, meeting):
+    """ Build the solution going through the state where both sides of a
+    bidirectional search met
+
+    :param forward: (dict) the table of the forward search
+    :param backward: (dict) the table of the backward search
+    :param meeting: (tuple) the key of the state reached by both sides
+    :return: (list) the moves (player, direction) of the solution
+    """
+    moves = list()
+    state, link, move, depth = forward[meeting]
+
+    while link is not None:
+        moves.append(move)
+        state, link, move, depth = forward[link]
+
+    moves.reverse()
+
+    # with symmetry, both sides may have reached the meeting state with
+    # the other players numbered differently: renumber the backward moves
+    forward_state, backward_state = forward[meeting][0], backward[meeting][0]
+    numbers = [forward_state.index(index) for index in backward_state]
+    state, link, move, depth = backward[meeting]
+
+    while link is not None:
+        moves.append((numbers[move[0]], move[1]))
+        state, link, move, depth = backward[link]
+
+    return moves
+
+
+def bitset_bfs(game, symmetry=False, stats=None, max_states=MAX_BITSET):
+    """ Find a shortest solution of a game with a breadth-first search
+    marking the visited states in a bitset. A state packed by
+    :meth:`Game.pack` is below (width * height) ** players, so it can index
+    a bit of a table of that size: each state costs a bit instead of an
+    entry of a dict, which suits the exhaustive search of small boards. The
+    depths are kept as arrays of packed states to rebuild the solution (see
+    :func:`get_layered_path`)
+
+    :param game: (Game) the game to solve
+    :param symmetry: (bool) see :func:`bfs`
+    :param stats: (dict) see :func:`bfs`
+    :param max_states: (int) the largest number of bits of the table
+    :return: (list) the moves (player, direction) of the solution, or
+        None if the game can't be solved
+    :raises ValueError: if the game has more than [max_states] states
+    :Examples:
+
+    >>> len(bitset_bfs(Game.from_file('../data/grid4.json')))
+    7
+    >>> len(bitset_bfs(Game.from_file('../data/grid3.json'), True))
+    6
+    >>> bitset_bfs(Game.from_file('../data/grid2.json')) is None
+    True
+
+    The 8x8 grid4 has 2 players, so 64 ** 2 states:
+
+    >>> bitset_bfs(Game.from_file('../data/grid4.json'), max_states=4095)
+    Traceback (most recent call last):
+    ...
+    ValueError: The states of the game don't fit in the bitset
+    """
+    start = game.get_state()
+    stats = dict() if stats is None else stats
+    stats['expanded'] = 0
+    size = game.get_grid().get_width() * game.get_grid().get_height()
+
+    if size ** len(start) > max_states:
+        raise ValueError("The states of the game don't fit in the bitset")
+
+    if game.is_dead(start):
+        return None
+    elif game.is_winning(start):
+        return []
+
+    def key(state):
+        return game.pack(game.canonical(state) if symmetry else state)
+
+    visited = bytearray((size ** len(start) + 7) // 8)
+    code = key(start)
+    visited[code >> 3] |= 1 << (code & 7)
+    layers = [array('Q', [code])]
+
+    while layers[-1]:
+        layer = array('Q')
+
+        for config_code in layers[-1]:
+            stats['expanded'] += 1
+
+            for num, direction, state in \
+                    game.successors(game.unpack(config_code)):
+                code = key(state)
+
+                if not visited[code >> 3] & 1 << (code & 7):
+                    visited[code >> 3] |= 1 << (code & 7)
+
+                    if game.is_winning(state):
+                        return get_layered_path(game, key, layers, code)
+
+                    layer.append(code)
+
+        layers.append(layer)
+
+    return None
+
+
+METHODS = {'bfs': bfs, 'astar': astar, 'idastar': idastar, 'iddfs': iddfs,
+           'bidirectional': bidirectional, 'bitset': bitset_bfs}
+
+
+def solve_file(filename, method='bfs', symmetry=False, bitboard=False,
+               cache=None, tables=False):
+    """ Solve the game of a config file and gather the figures of the search
+
+    :param filename: (str) the path of the config file
+    :param method: (str) the name of the search algorithm (see METHODS)
+    :param symmetry: (bool) see :func:`bfs`
+    :param bitboard: (bool) if True, the slides are computed with bitmasks
+    :param cache: (str) the path of the database of a :class:`Cache.Cache`
+        where the solution is looked for before searching, and saved after
+        (None not to use any cache). If the cache can't be opened, the game
+        is solved without it (see :func:`Cache.open_cache`)
+    :param tables: (bool) if True, the tables of the board (see
+        :meth:`Board.save_tables`) are loaded from the file named after the
+        config file with the extension '.tables', or saved there if it
+        doesn't exist yet, can't be read or holds the tables of another
+        layout (the walls or thawed cells of the config file having
+        changed), even when the solution comes from the cache
+    :return: (dict) the keys 'file', 'moves' (the list of the moves
+        (player, direction) of a shortest solution, or None if the game
+        can't be solved), 'length', 'method' (the search actually used,
+        which differs from [method] when :func:`bidirectional` falls back
+        on :func:`bfs`), 'expanded' (the number of states whose
+        successors were generated, 0 if the solution was in the cache),
+        'cached' (True if the solution was in the cache) and 'time' (in
+        seconds)
+    :UC: filename.endswith(".json")
+    """
+    begin = perf_counter()
+    stats = {'expanded': 0}
+    tables = os.path.splitext(filename)[0] + '.tables' if tables else None
+
+    # the layout of the tables already saved, None if they can't be used
+    saved = None if tables is None else load_tables(tables)
+
+    game = Game.from_file(filename, Bitboard if bitboard else None)
+    solutions = open_cache(cache) if cache is not None else None
+    moves, cached = None, False
+
+    if solutions is not None:
+        try:
+            moves, cached = solutions.get_solution(game), True
+        except KeyError:
+            pass
+
+    if not cached:
+        moves = METHODS[method](game, symmetry, stats)
+
+        if solutions is not None:
+            solutions.set_solution(game, moves)
+
+    board = game.get_grid().get_board()
+
+    if tables is not None and saved != board.get_layout_key():
+        board.save_tables(tables)
+
+    if solutions is not None:
+        solutions.close()
+
+    return {'file': filename,
+            'moves': moves,
+            'length': None if moves is None else len(moves),
+            'method': stats.get('method', method),
+            'expanded': stats['expanded'],
+            'cached': cached,
+            'time': round(perf_counter() - begin, 6)}
+
+
+def add_search_options(parser):
+    """ Add the options shared by all the searches to the parser of a
+    command line tool: --symmetry and --bitboard
+
+    :param parser: (argparse.ArgumentParser) the parser
+    :Examples:
+
+    >>> parser = argparse.ArgumentParser()
+    >>> add_search_options(parser)
+    >>> args = parser.parse_args(['--bitboard'])
+    >>> args.symmetry, args.bitboard
+    (False, True)
+    """
+    parser.add_argument("--symmetry", action="store_true",
+                        help="consider the players other than the main one "
+                             "as interchangeable")
+    parser.add_argument("--bitboard", action="store_true",
+                        help="compute the slides with bitmasks")
+
+
+def add_options(parser):
+    """ Add the options of :func:`solve_file` to the parser of a command
+    line tool: --method, --no-cache, --tables and the options of
+    :func:`add_search_options`
+
+    :param parser: (argparse.ArgumentParser) the parser
+    :Examples:
+
+    >>> parser = argparse.ArgumentParser()
+    >>> add_options(parser)
+    >>> args = parser.parse_args(['--method', 'astar', '--no-cache'])
+    >>> args.method, args.symmetry, args.no_cache
+    ('astar', False, True)
+    """
+    parser.add_argument("--method", choices=sorted(METHODS), default="bfs",
+                        help="the search algorithm (default: bfs)")
+    add_search_options(parser)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="search even the games solved by a previous "
+                             "run, and don't save the solutions")
+    parser.add_argument("--tables", action="store_true",
+                        help="load the tables of the boards from '.tables' "
+                             "files next to the config files (or save them)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve an Ice Walker grid")
+    parser.add_argument("filename", help="the path of the config file")
+    add_options(parser)
+    args = parser.parse_args()
+
+    try:
+        result = solve_file(args.filename, args.method, args.symmetry,
+                            args.bitboard,
+                            None if args.no_cache else DEFAULT_PATH,
+                            args.tables)
+    except ValueError as error:
+        parser.error(error)
+
+    if result['method'] != args.method:
+        print("Warning: too many winning states, solved with %s instead"
+              % result['method'], file=sys.stderr)
+
+    moves = result['moves']
+
+    if moves is None:
+        print("Not solvable")
+        return
+
+    for move in moves:
+        print(move)
 
 
 if __name__ == "__main__":
-    import sys
     main()
-